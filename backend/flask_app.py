@@ -214,6 +214,79 @@ def extract_identity():
         logger.error(f"Identity extraction error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+# Preflight quality assessor, built on first use (OpenCV is a heavy import)
+@lru_cache(maxsize=1)
+def get_quality_assessor():
+    from src.modules.document_processor import DocumentQualityAssessor
+    # Mobile captures: measure inside the card outline when one is visible;
+    # metrics run concurrently since single-request latency is what matters here,
+    # with float32 derivatives keeping blur cheap
+    return DocumentQualityAssessor(crop_to_document=True, metric_workers=4,
+                                   derivative_precision='float32')
+
+@app.route('/assessQuality', methods=['POST', 'OPTIONS'])
+def assess_quality():
+    """
+    Preflight Quality Endpoint
+    Scores the capture (or a client thumbnail of it) so unusable images are
+    rejected before calling /extractIdentity.
+    Optional fields: sourceWidth (original width when 'image' is a thumbnail),
+    minScore (acceptance threshold, default 50).
+    """
+    try:
+        if request.method == 'OPTIONS':
+            return '', 200
+        
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "Missing request body"}), 400
+        if not isinstance(data, dict):
+            return jsonify({"error": "Request body must be a JSON object"}), 400
+        
+        image_base64 = data.get('image', '')
+        if not isinstance(image_base64, str):
+            return jsonify({"error": "'image' must be a base64 string"}), 400
+        image_base64 = image_base64.strip()
+        if not image_base64:
+            return jsonify({"error": "Missing 'image' field in request body"}), 400
+        
+        # Strip data URI prefix if present (e.g., "data:image/jpeg;base64,")
+        if ',' in image_base64:
+            image_base64 = image_base64.split(',', 1)[1]
+        
+        source_width = data.get('sourceWidth')
+        min_score = data.get('minScore', 50)
+        if source_width is not None and (not isinstance(source_width, int) or source_width <= 0):
+            return jsonify({"error": "'sourceWidth' must be a positive integer"}), 400
+        if not isinstance(min_score, int) or not 0 <= min_score <= 100:
+            return jsonify({"error": "'minScore' must be an integer between 0 and 100"}), 400
+        
+        import base64
+        try:
+            image_bytes = base64.b64decode(image_base64)
+        except Exception as e:
+            return jsonify({"error": f"Invalid base64 image data: {str(e)}"}), 400
+        
+        result = get_quality_assessor().assess_preflight(
+            image_bytes, source_width=source_width, min_score=min_score
+        )
+        if not result['success']:
+            return jsonify({"error": f"Unreadable image: {result['error']}"}), 400
+        
+        return jsonify({
+            "score": result['score'],
+            "level": result['level'],
+            "acceptable": result['gate']['passed'],
+            "metrics": {
+                name: {"severity": metric.get('severity'), "message": metric.get('message')}
+                for name, metric in result['metrics'].items()
+            }
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Quality preflight error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/reports/verification', methods=['POST'])
 @require_rpr_admin
 def generate_verification_report():
@@ -6,8 +6,587 @@ Implements Gemini image solution metrics
 import cv2
 import numpy as np
 from PIL import Image
-from typing import Dict, Tuple
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+import io
 import logging
+import os
+import threading
+import time
+import tracemalloc
+
+
+def _fft_quadrant_energy(gray: np.ndarray) -> float:
+    """
+    Mean FFT magnitude over the shifted spectrum from row h//4 and column
+    w//4 on (the FFT blur metric), computed from a real FFT of gray
+    The region is a product of a row and a column range, so the sum over it
+    is two vector-matrix-vector products: one over the stored rfft2 half and
+    one over the conjugate entries it leaves out
+    """
+    h, w = gray.shape
+    magnitude = np.abs(np.fft.rfft2(gray))
+    # Region membership per unshifted frequency index
+    rows = np.fft.ifftshift(np.arange(h) >= h // 4).astype(magnitude.dtype)
+    all_cols = np.fft.ifftshift(np.arange(w) >= w // 4)
+    cols = all_cols[:w // 2 + 1].astype(magnitude.dtype)
+    
+    # rfft2 drops the conjugate of every column strictly between DC and Nyquist;
+    # entry (r, c) stands in for (-r, -c) there
+    mirrored_rows = rows[-np.arange(h) % h]
+    mirrored_cols = np.zeros_like(cols)
+    paired = np.arange(1, (w + 1) // 2)
+    mirrored_cols[paired] = all_cols[w - paired]
+    
+    total = rows @ magnitude @ cols + mirrored_rows @ magnitude @ mirrored_cols
+    return float(total) / ((h - h // 4) * (w - w // 4))
+
+# Supported reduced-decode factors and their cv2.imdecode flags
+REDUCED_DECODE_FLAGS = {
+    1: (cv2.IMREAD_COLOR, cv2.IMREAD_GRAYSCALE),
+    2: (cv2.IMREAD_REDUCED_COLOR_2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+    4: (cv2.IMREAD_REDUCED_COLOR_4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    8: (cv2.IMREAD_REDUCED_COLOR_8, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+}
+
+
+def decode_image(data: Union[bytes, bytearray, memoryview], reduction: int = 1,
+                 grayscale: bool = False) -> np.ndarray:
+    """
+    Decode an in-memory image with cv2.imdecode
+    reduction: 1, 2, 4 or 8; JPEG decoders skip work for reduced sizes
+    Returns None when the buffer cannot be decoded
+    """
+    if reduction not in REDUCED_DECODE_FLAGS:
+        raise ValueError(f"Unsupported decode reduction: {reduction}")
+    
+    color_flag, gray_flag = REDUCED_DECODE_FLAGS[reduction]
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if buffer.size == 0:
+        return None
+    return cv2.imdecode(buffer, gray_flag if grayscale else color_flag)
+
+
+MULTI_PAGE_EXTENSIONS = {'.tif', '.tiff', '.pdf'}
+
+
+def document_page_count(path: str) -> int:
+    """Number of pages in a document without decoding any of them"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.pdf':
+        import fitz  # PyMuPDF, optional: only needed for PDF input
+        with fitz.open(path) as document:
+            return document.page_count
+    if ext in ('.tif', '.tiff'):
+        with Image.open(path) as image:
+            return getattr(image, 'n_frames', 1)
+    return 1
+
+
+def iter_document_pages(path: str, pdf_dpi: int = 200) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Lazily yield (page_index, BGR image) for every page of a document
+    Multi-page TIFFs are decoded one frame at a time, exactly as cv2.imread
+    decodes the first (16-bit frames are scaled to 8-bit); PDFs are rendered one
+    page at a time at pdf_dpi (requires PyMuPDF); other formats yield a
+    single page
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.pdf':
+        import fitz  # PyMuPDF, optional: only needed for PDF input
+        with fitz.open(path) as document:
+            for page_index, page in enumerate(document):
+                pixmap = page.get_pixmap(dpi=pdf_dpi, alpha=False)
+                samples = np.frombuffer(pixmap.samples, dtype=np.uint8)
+                samples = samples.reshape(pixmap.height, pixmap.width, pixmap.n)
+                if pixmap.n == 1:
+                    yield page_index, cv2.cvtColor(samples, cv2.COLOR_GRAY2BGR)
+                else:
+                    yield page_index, cv2.cvtColor(samples, cv2.COLOR_RGB2BGR)
+        return
+    
+    if ext in ('.tif', '.tiff'):
+        for page_index in range(document_page_count(path)):
+            ok, frames = cv2.imreadmulti(path, start=page_index, count=1, flags=cv2.IMREAD_COLOR)
+            if not ok or not frames:
+                raise ValueError(f"Failed to load page {page_index} of {path}")
+            yield page_index, frames[0]
+        return
+    
+    image = cv2.imread(path)
+    if image is None:
+        raise ValueError(f"Failed to load image: {path}")
+    yield 0, image
+
+
+def iter_video_frames(path: str, stride: int = 1) -> Iterator[np.ndarray]:
+    """Decode every stride-th frame of a video file (or capture URL)"""
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Failed to open video: {path}")
+    try:
+        index = 0
+        while capture.grab():
+            if index % stride == 0:
+                ok, frame = capture.retrieve()
+                if ok:
+                    yield frame
+            index += 1
+    finally:
+        capture.release()
+
+
+# Thumbnail size and plausible image-area share for document localization
+DOCUMENT_LOCATE_LONG_EDGE = 512
+DOCUMENT_COVERAGE_RANGE = (0.1, 0.9)
+
+
+def order_corners(points: np.ndarray) -> np.ndarray:
+    """Order four points as top-left, top-right, bottom-right, bottom-left"""
+    points = np.asarray(points, dtype=np.float32).reshape(4, 2)
+    sums = points.sum(axis=1)
+    diffs = points[:, 1] - points[:, 0]
+    return np.array([
+        points[np.argmin(sums)],
+        points[np.argmin(diffs)],
+        points[np.argmax(sums)],
+        points[np.argmax(diffs)]
+    ], dtype=np.float32)
+
+
+def locate_document(image: np.ndarray, scale: float = 1.0,
+                    long_edge: int = DOCUMENT_LOCATE_LONG_EDGE) -> Union[Dict, None]:
+    """
+    Find the card or page quadrilateral on a thumbnail
+    scale: ratio of image to source resolution; the region is reported in
+    source coordinates so it applies to the full decode
+    Returns: {'quad': [tl, tr, br, bl], 'bbox': [x, y, w, h], 'coverage'}
+    or None when no plausible document outline is found (e.g. flat scans)
+    """
+    h, w = image.shape[:2]
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    thumb_scale = min(1.0, long_edge / max(h, w))
+    if thumb_scale < 1:
+        gray = cv2.resize(gray, (max(1, round(w * thumb_scale)), max(1, round(h * thumb_scale))),
+                          interpolation=cv2.INTER_AREA)
+    
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    
+    min_coverage, max_coverage = DOCUMENT_COVERAGE_RANGE
+    thumb_area = gray.shape[0] * gray.shape[1]
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        coverage = cv2.contourArea(contour) / thumb_area
+        if coverage < min_coverage:
+            break
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4 and cv2.isContourConvex(approx) and coverage <= max_coverage:
+            quad = order_corners(approx) / (thumb_scale * scale)
+            x, y, bw, bh = cv2.boundingRect(quad)
+            return {
+                'quad': quad.round(1).tolist(),
+                'bbox': [x, y, bw, bh],
+                'coverage': round(float(coverage), 4)
+            }
+    return None
+
+
+def document_crop(image: np.ndarray, region: Dict, scale: float = 1.0) -> np.ndarray:
+    """Axis-aligned view of image over the region's bounding box (no copy)"""
+    x, y, w, h = (int(round(v * scale)) for v in region['bbox'])
+    return image[max(0, y):y + h, max(0, x):x + w]
+
+
+def document_warp(region: Dict) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Homography taking the region's quad to an upright rectangle sized by its
+    longest opposite edges
+    Returns: (matrix, (width, height))
+    """
+    tl, tr, br, bl = np.float32(region['quad'])
+    width = max(1, int(round(max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl)))))
+    height = max(1, int(round(max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr)))))
+    dst = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+    return cv2.getPerspectiveTransform(np.float32([tl, tr, br, bl]), dst), (width, height)
+
+
+def gray_histogram(gray: np.ndarray) -> np.ndarray:
+    """256-bin intensity histogram of an 8-bit grayscale plane"""
+    return cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel().astype(np.float64)
+
+
+def histogram_statistics(histogram: np.ndarray) -> Tuple[float, float]:
+    """(mean, std) of the intensities a 256-bin histogram describes"""
+    levels = np.arange(histogram.size, dtype=np.float64)
+    count = histogram.sum()
+    mean = histogram @ levels / count
+    variance = histogram @ (levels - mean) ** 2 / count
+    return float(mean), float(np.sqrt(variance))
+
+
+def histogram_percentile(histogram: np.ndarray, percent: float) -> int:
+    """Lowest intensity at or below which percent of the pixels fall"""
+    cumulative = np.cumsum(histogram)
+    return int(np.searchsorted(cumulative, cumulative[-1] * percent / 100))
+
+
+# Projection-profile deskew: binarized long edge, search range and step sizes
+PROJECTION_LONG_EDGE = 800
+PROJECTION_SEARCH_DEGREES = 15
+PROJECTION_COARSE_STEP = 1.0
+PROJECTION_FINE_STEP = 0.1
+PROJECTION_MAX_PIXELS = 200_000
+# Estimates from fewer text lines (photos, sparse ID cards) are not trusted
+PROJECTION_MIN_TEXT_LINES = 8
+
+
+def projection_profiles(mask: np.ndarray) -> Optional[Callable[[float], np.ndarray]]:
+    """
+    Row profile of a binary mask rotated by an angle (degrees)
+    Returns profile(angle) -> per-row counts of set pixels (at most
+    PROJECTION_MAX_PIXELS, evenly subsampled); None when the mask is empty
+    or completely set
+    """
+    ys, xs = np.nonzero(mask)
+    if ys.size == 0 or ys.size == mask.size:
+        return None
+    if ys.size > PROJECTION_MAX_PIXELS:
+        step = -(-ys.size // PROJECTION_MAX_PIXELS)
+        ys, xs = ys[::step], xs[::step]
+    # Integer centre: a half-pixel offset would make rint pair up rows at 0 degrees
+    ys = ys.astype(np.float32) - mask.shape[0] // 2
+    xs = xs.astype(np.float32) - mask.shape[1] // 2
+    offset = int(np.hypot(*mask.shape[:2])) + 1
+    
+    def profile(angle: float) -> np.ndarray:
+        radians = np.radians(angle)
+        rows = np.rint(ys * np.cos(radians) + xs * np.sin(radians)).astype(np.int64) + offset
+        return np.bincount(rows, minlength=2 * offset + 1)
+    
+    return profile
+
+
+def projection_skew(gray: np.ndarray, long_edge: int = PROJECTION_LONG_EDGE,
+                    search_degrees: float = PROJECTION_SEARCH_DEGREES) -> Tuple[float, int]:
+    """
+    Skew of dark text on a light page from horizontal projection profiles
+    Ink pixels of an Otsu-binarized thumbnail are projected onto rows for
+    each candidate angle; the angle whose profile has the most energy
+    (sharpest text-line peaks) wins, searched coarse then fine
+    Positive angles follow cv2.getRotationMatrix2D (counter-clockwise)
+    Returns: (angle, text_line_count); (0.0, 0) when there is no ink
+    """
+    h, w = gray.shape[:2]
+    scale = min(1.0, long_edge / max(h, w))
+    if scale < 1:
+        gray = cv2.resize(gray, (max(1, round(w * scale)), max(1, round(h * scale))),
+                          interpolation=cv2.INTER_AREA)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    
+    profile = projection_profiles(binary)
+    if profile is None:
+        return 0.0, 0
+    
+    def best_angle(candidates: np.ndarray) -> float:
+        energies = [float(np.dot(counts, counts)) for counts in map(profile, candidates)]
+        return float(candidates[int(np.argmax(energies))])
+    
+    coarse = best_angle(np.arange(-search_degrees, search_degrees + PROJECTION_COARSE_STEP / 2,
+                                  PROJECTION_COARSE_STEP))
+    fine = best_angle(np.arange(coarse - PROJECTION_COARSE_STEP,
+                                coarse + PROJECTION_COARSE_STEP + PROJECTION_FINE_STEP / 2,
+                                PROJECTION_FINE_STEP))
+    
+    # Text lines: runs of rows whose ink exceeds the mean at the best angle
+    counts = profile(fine)
+    rows = counts > counts[counts > 0].mean()
+    line_count = int(np.count_nonzero(np.diff(rows.astype(np.int8)) == 1))
+    return round(fine, 2) + 0.0, line_count
+
+
+# OpenCV output depth for blur derivatives at each supported precision
+DERIVATIVE_DEPTHS = {'float64': cv2.CV_64F, 'float32': cv2.CV_32F, 'int16': cv2.CV_16S}
+
+
+def derivative_gradient_magnitude(gray: np.ndarray, precision: str = 'float64') -> np.ndarray:
+    """
+    Sobel gradient magnitude at the given precision; int16 derivatives
+    (exact for 8-bit input) are widened to float32 for cv2.magnitude
+    """
+    depth = DERIVATIVE_DEPTHS[precision]
+    gx = cv2.Sobel(gray, depth, 1, 0, ksize=3)
+    gy = cv2.Sobel(gray, depth, 0, 1, ksize=3)
+    if depth == cv2.CV_16S:
+        gx, gy = gx.astype(np.float32), gy.astype(np.float32)
+    return cv2.magnitude(gx, gy)
+
+
+class MetricHistogram:
+    """
+    Fixed-bucket histogram of one instrumented quantity
+    bounds are inclusive upper edges; one overflow bucket follows
+    """
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+    
+    def snapshot(self) -> Dict:
+        return {
+            'bounds': list(self.bounds),
+            'counts': list(self.counts),
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.maximum
+        }
+
+
+class MetricHistogramRegistry:
+    """
+    Process-wide wall time and peak allocation histograms per instrumented
+    stage (image load and each quality metric)
+    """
+    
+    # 0.1 ms .. ~13 s, doubling
+    SECONDS_BOUNDS = tuple(0.0001 * 2 ** i for i in range(18))
+    # 64 KiB .. 4 GiB, doubling
+    BYTES_BOUNDS = tuple(65536 * 2 ** i for i in range(17))
+    
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, stage: str, seconds: float, peak_bytes: int):
+        with self._lock:
+            if stage not in self._histograms:
+                self._histograms[stage] = {
+                    'seconds': MetricHistogram(self.SECONDS_BOUNDS),
+                    'peak_bytes': MetricHistogram(self.BYTES_BOUNDS)
+                }
+            histograms = self._histograms[stage]
+            histograms['seconds'].observe(seconds)
+            histograms['peak_bytes'].observe(peak_bytes)
+    
+    def snapshot(self) -> Dict:
+        """Plain-dict copy of every histogram, keyed by stage"""
+        with self._lock:
+            return {
+                stage: {name: histogram.snapshot() for name, histogram in histograms.items()}
+                for stage, histograms in self._histograms.items()
+            }
+    
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+# Shared by every instrumented assessor in this process
+METRIC_HISTOGRAMS = MetricHistogramRegistry()
+
+
+# Profilers (and nested stages) currently relying on tracemalloc; tracing
+# started here stops only when the last of them exits
+_TRACING_LOCK = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+
+
+def _acquire_tracing():
+    """Register a tracemalloc user, starting tracing if nothing else has"""
+    global _tracing_users, _tracing_started
+    with _TRACING_LOCK:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_users += 1
+
+
+def _release_tracing():
+    """Drop a tracemalloc user, stopping tracing we started after the last one"""
+    global _tracing_users, _tracing_started
+    with _TRACING_LOCK:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+
+class MetricProfiler:
+    """
+    Records wall time and tracemalloc peak per stage of one assessment
+    Tracing is reference-counted across every profiler in the process:
+    started on the first entry (unless already running) and stopped once
+    the last profiler exits. The traced peak is process-wide, so under
+    concurrency a stage's peak_bytes also counts other threads' allocations
+    and restarts whenever another stage begins
+    """
+    
+    def __init__(self, registry: MetricHistogramRegistry = None):
+        self.registry = registry or METRIC_HISTOGRAMS
+        self.timings = {}
+    
+    def __enter__(self) -> 'MetricProfiler':
+        _acquire_tracing()
+        return self
+    
+    def __exit__(self, *exc_info):
+        _release_tracing()
+    
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        with self:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                seconds = time.perf_counter() - start
+                peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+                self.timings[stage] = {'seconds': round(seconds, 6), 'peak_bytes': peak_bytes}
+                self.registry.observe(stage, seconds, peak_bytes)
+    
+    def wrap(self, stage: str, assess: Callable[[], Dict]) -> Callable[[], Dict]:
+        """Deferred assessment measured under stage when it runs"""
+        def measured() -> Dict:
+            with self.measure(stage):
+                return assess()
+        return measured
+
+
+class ImageAnalysisContext:
+    """
+    Per-image cache of derived planes shared by the quality metrics
+    Each plane is computed once, on first access; planes have their own
+    locks so metrics running on different threads share them safely
+    """
+    
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self._planes = {}
+        self._plane_locks = {}
+        self._locks_guard = threading.Lock()
+    
+    def _plane(self, name, compute: Callable[[], object]):
+        """Cached plane name, computed at most once even under concurrent access"""
+        if name in self._planes:
+            return self._planes[name]
+        with self._locks_guard:
+            lock = self._plane_locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._planes:
+                self._planes[name] = compute()
+        return self._planes[name]
+    
+    @property
+    def shape(self) -> Tuple:
+        return self.image.shape
+    
+    @property
+    def gray(self) -> np.ndarray:
+        """Single-channel view of the image"""
+        def compute() -> np.ndarray:
+            if len(self.image.shape) == 3:
+                return cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+            return self.image
+        return self._plane('gray', compute)
+    
+    @property
+    def histogram(self) -> Union[np.ndarray, None]:
+        """
+        256-bin intensity histogram of the grayscale plane, shared by
+        brightness, contrast and exposure checks; None for non-8-bit planes
+        """
+        return self._plane(
+            'histogram', lambda: gray_histogram(self.gray) if self.gray.dtype == np.uint8 else None
+        )
+    
+    @property
+    def intensity_statistics(self) -> Tuple[float, float]:
+        """(mean, std) of the grayscale plane, from the histogram when 8-bit"""
+        def compute() -> Tuple[float, float]:
+            if self.histogram is not None:
+                return histogram_statistics(self.histogram)
+            mean, std = cv2.meanStdDev(self.gray)
+            return float(mean[0, 0]), float(std[0, 0])
+        return self._plane('intensity_statistics', compute)
+    
+    @property
+    def sobel_x(self) -> np.ndarray:
+        return self._plane('sobel_x', lambda: cv2.Sobel(self.gray, cv2.CV_64F, 1, 0, ksize=3))
+    
+    @property
+    def sobel_y(self) -> np.ndarray:
+        return self._plane('sobel_y', lambda: cv2.Sobel(self.gray, cv2.CV_64F, 0, 1, ksize=3))
+    
+    @property
+    def gradient_magnitude(self) -> np.ndarray:
+        return self._plane('gradient_magnitude', lambda: cv2.magnitude(self.sobel_x, self.sobel_y))
+    
+    @property
+    def laplacian(self) -> np.ndarray:
+        return self._plane('laplacian', lambda: cv2.Laplacian(self.gray, cv2.CV_64F))
+    
+    def laplacian_variance(self, precision: str = 'float64') -> float:
+        """
+        Variance of the Laplacian; reduced precisions keep only a float32 or
+        int16 plane alive and reduce it with cv2.meanStdDev
+        """
+        if precision == 'float64':
+            return self._plane(('laplacian_variance', precision), lambda: self.laplacian.var())
+        
+        def compute() -> float:
+            _, std = cv2.meanStdDev(cv2.Laplacian(self.gray, DERIVATIVE_DEPTHS[precision]))
+            return float(std[0, 0]) ** 2
+        return self._plane(('laplacian_variance', precision), compute)
+    
+    def gradient_mean(self, precision: str = 'float64') -> float:
+        """Mean Sobel gradient magnitude at the given precision"""
+        if precision == 'float64':
+            return self._plane(('gradient_mean', precision), lambda: self.gradient_magnitude.mean())
+        return self._plane(
+            ('gradient_mean', precision),
+            lambda: cv2.mean(derivative_gradient_magnitude(self.gray, precision))[0]
+        )
+    
+    @property
+    def edges(self) -> np.ndarray:
+        """Canny edge map used by rotation detection"""
+        return self._plane('edges', lambda: cv2.Canny(self.gray, 50, 150))
+    
+    def downsampled_edges(self, long_edge: int) -> np.ndarray:
+        """Canny edge map of the grayscale plane capped at long_edge pixels"""
+        def compute() -> np.ndarray:
+            gray = self.gray
+            h, w = gray.shape[:2]
+            scale = long_edge / max(h, w)
+            if scale >= 1:
+                return self.edges
+            small = cv2.resize(gray, (max(1, round(w * scale)), max(1, round(h * scale))),
+                               interpolation=cv2.INTER_AREA)
+            return cv2.Canny(small, 50, 150)
+        return self._plane(('downsampled_edges', long_edge), compute)
+    
+    @classmethod
+    def wrap(cls, image: Union[np.ndarray, 'ImageAnalysisContext']) -> 'ImageAnalysisContext':
+        """Return image unchanged if it is already a context, otherwise wrap it"""
+        if isinstance(image, cls):
+            return image
+        return cls(image)
+
 
 class DocumentQualityAssessor:
     """
@@ -15,26 +594,149 @@ class DocumentQualityAssessor:
     Based on Gemini image solution specifications
     """
     
-    def __init__(self):
+    # Bump when metric or scoring logic changes; namespaces cached results
+    VERSION = '2.0'
+    
+    # Severity boundaries per metric; rotation is an upper bound,
+    # brightness an inclusive (low, high) band, the rest lower bounds
+    SEVERITY_THRESHOLDS = {
+        'dpi': {'green': 200, 'yellow': 100},
+        'contrast': {'green': 75, 'yellow': 60},
+        'rotation': {'green': 1, 'yellow': 5},
+        'blur': {'green': 70, 'yellow': 40},
+        'brightness': {'green': (50, 200), 'yellow': (30, 225)}
+    }
+    
+    # Overall score contribution per metric and per severity
+    METRIC_WEIGHTS = {
+        'dpi': 0.2,
+        'contrast': 0.25,
+        'rotation': 0.2,
+        'blur': 0.25,
+        'brightness': 0.1
+    }
+    SEVERITY_SCORES = {'GREEN': 100, 'YELLOW': 70, 'RED': 30}
+    
+    # Gate order: metrics in earlier tiers are cheaper to compute
+    GATE_TIERS = (('dpi', 'brightness'), ('contrast',), ('blur', 'rotation'))
+    
+    # Raw blur responses that map to a normalized score of 100
+    BLUR_NORMALIZATION = {'laplacian': 500, 'gradient': 50, 'fft': 100000}
+    BLUR_WEIGHTS = {'laplacian': 0.4, 'gradient': 0.35, 'fft': 0.25}
+    
+    # Derivative precisions selectable for the Laplacian / gradient blur metrics
+    DERIVATIVE_PRECISIONS = tuple(DERIVATIVE_DEPTHS)
+    
+    # Blur FFT estimators selectable on assess_blur; 'tiles' is approximate
+    FFT_METHODS = ('full', 'tiles')
+    FFT_WINDOW_SIZE = 512
+    FFT_TILE_GRID = 3
+    
+    # Row band height for the tile-streaming path on very large scans
+    TILE_STRIP_ROWS = 256
+    
+    # Hough accumulator votes required for a line at full resolution (legacy engine)
+    HOUGH_VOTE_THRESHOLD = 100
+    
+    # Rotation engines selectable on assess_rotation
+    ROTATION_METHODS = ('probabilistic', 'projection', 'legacy')
+    # Line segments kept per image by the probabilistic engine
+    MAX_HOUGH_LINES = 500
+    # Lines folded further than this from an axis are texture, not skew
+    MAX_SKEW_DEGREES = 40
+    ROTATION_BIN_DEGREES = 0.5
+    # Edge map size for the probabilistic engine
+    ROTATION_EDGE_LONG_EDGE = 1024
+    # Fewer segments than this (text without long strokes) defer to projection_skew
+    MIN_SKEW_SEGMENTS = 8
+    # Histogram peaks are refined within +/- this range, at this step
+    ROTATION_REFINE_DEGREES = 1.0
+    ROTATION_REFINE_STEP = 0.1
+    
+    # Intensities at or below / at or above which pixels count as clipped
+    EXPOSURE_CLIP_LEVELS = (5, 250)
+    
+    # Metrics whose proxy-scale value tracks full resolution; rotation is
+    # scored from the full image (the default engine already works on a
+    # bounded edge map, and the legacy mean angle is not scale-stable) and
+    # so is blur, whose fine-detail response does not survive downscaling
+    # in any content-independent way
+    PROXY_METRICS = ('contrast', 'brightness')
+    
+    # Metrics measured inside the located document when crop_to_document is set
+    CROPPED_METRICS = ('contrast', 'blur', 'rotation')
+    
+    def __init__(self, fast_path: bool = False, proxy_long_edge: int = 1024,
+                 escalation_margin: float = 0.1, fft_method: str = 'full',
+                 rotation_method: str = 'probabilistic', tiled_pixel_threshold: int = 50_000_000,
+                 cache=None, instrument: bool = False, crop_to_document: bool = False,
+                 metric_workers: int = None, derivative_precision: str = 'float64'):
+        """
+        fast_path: score PROXY_METRICS on a downscaled proxy, escalating to
+        full resolution only for metrics within escalation_margin (relative)
+        of a severity boundary
+        fft_method: default blur FFT estimator, one of FFT_METHODS
+        rotation_method: default rotation engine, one of ROTATION_METHODS
+        tiled_pixel_threshold: images above this pixel count are scored with
+        the bounded-memory tile-streaming path (None disables it); rotation
+        is then estimated on a thumbnail, with 'legacy' run as 'probabilistic'
+        cache: optional QualityResultCache memoizing results by image bytes
+        instrument: record wall time and tracemalloc peak for the image load
+        and each metric under the result's 'timings' key, and feed them to
+        METRIC_HISTOGRAMS
+        crop_to_document: locate the card/page outline on a thumbnail and
+        measure CROPPED_METRICS inside it; the region is returned as
+        'document_region' for DocumentEnhancer.correct_perspective
+        metric_workers: run independent metrics concurrently on a shared
+        thread pool of this size (None or 1 runs them in sequence); above 1,
+        construction caps OpenCV's process-wide thread count at
+        cpu_count // metric_workers (see _share_opencv_threads)
+        derivative_precision: Laplacian / Sobel depth for the blur metrics,
+        one of DERIVATIVE_PRECISIONS; 'float32' and 'int16' cut derivative
+        memory by 2-4x and track 'float64' well within rounding of the score
+        """
+        if fft_method not in self.FFT_METHODS:
+            raise ValueError(f"Unknown FFT method: {fft_method}")
+        if rotation_method not in self.ROTATION_METHODS:
+            raise ValueError(f"Unknown rotation method: {rotation_method}")
+        if derivative_precision not in self.DERIVATIVE_PRECISIONS:
+            raise ValueError(f"Unknown derivative precision: {derivative_precision}")
+        
         self.logger = logging.getLogger(__name__)
         self.metrics = {}
+        self.fast_path = fast_path
+        self.proxy_long_edge = proxy_long_edge
+        self.escalation_margin = escalation_margin
+        self.fft_method = fft_method
+        self.rotation_method = rotation_method
+        self.tiled_pixel_threshold = tiled_pixel_threshold
+        self.cache = cache
+        self.instrument = instrument
+        self.crop_to_document = crop_to_document
+        self.metric_workers = metric_workers
+        self.derivative_precision = derivative_precision
+        if metric_workers and metric_workers > 1:
+            _share_opencv_threads(metric_workers)
         
-    def assess_dpi(self, image: np.ndarray, physical_width_mm: float = 215) -> Dict:
+    def assess_dpi(self, image: Union[np.ndarray, ImageAnalysisContext], physical_width_mm: float = 215,
+                   scale: float = 1.0) -> Dict:
         """
         Detect document DPI (dots per inch)
         Target: 200+ DPI (minimum 100 DPI acceptable)
+        scale: ratio of image to source resolution for reduced decodes
         """
         # Estimate DPI from image dimensions
         # A standard A4 document is 215mm wide
         if image is None:
             return {'dpi': 0, 'severity': 'RED', 'message': 'Invalid image'}
         
-        image_width_pixels = image.shape[1]
+        image_width_pixels = image.shape[1] / scale
         dpi = int((image_width_pixels * 25.4) / physical_width_mm)
         
-        if dpi >= 200:
+        thresholds = self.SEVERITY_THRESHOLDS['dpi']
+        if dpi >= thresholds['green']:
             severity = 'GREEN'
-        elif dpi >= 100:
+        elif dpi >= thresholds['yellow']:
             severity = 'YELLOW'
         else:
             severity = 'RED'
@@ -42,28 +744,27 @@ class DocumentQualityAssessor:
         return {
             'dpi': dpi,
             'severity': severity,
-            'message': f'DPI: {dpi} (target 200+)',
-            'status': 'acceptable' if dpi >= 100 else 'poor'
+            'message': f"DPI: {dpi} (target {thresholds['green']}+)",
+            'status': 'acceptable' if dpi >= thresholds['yellow'] else 'poor'
         }
     
-    def assess_contrast(self, image: np.ndarray) -> Dict:
+    def assess_contrast(self, image: Union[np.ndarray, ImageAnalysisContext]) -> Dict:
         """
         Analyze image contrast using standard deviation of pixel values
         Target: 75%+ contrast (acceptable 60%+)
         """
-        # Convert to grayscale
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
-        
+        _, std = ImageAnalysisContext.wrap(image).intensity_statistics
+        return self._contrast_result(std)
+    
+    def _contrast_result(self, contrast_std: float) -> Dict:
+        """Classify contrast from the grayscale standard deviation"""
         # Calculate contrast as percentage of std dev to max possible
-        contrast_std = np.std(gray)
         contrast_percent = min(100, (contrast_std / 128) * 100)
         
-        if contrast_percent >= 75:
+        thresholds = self.SEVERITY_THRESHOLDS['contrast']
+        if contrast_percent >= thresholds['green']:
             severity = 'GREEN'
-        elif contrast_percent >= 60:
+        elif contrast_percent >= thresholds['yellow']:
             severity = 'YELLOW'
         else:
             severity = 'RED'
@@ -71,123 +772,258 @@ class DocumentQualityAssessor:
         return {
             'contrast': round(contrast_percent, 1),
             'severity': severity,
-            'message': f'Contrast: {contrast_percent:.1f}% (target 75%+)',
-            'status': 'acceptable' if contrast_percent >= 60 else 'poor'
+            'message': f"Contrast: {contrast_percent:.1f}% (target {thresholds['green']}%+)",
+            'status': 'acceptable' if contrast_percent >= thresholds['yellow'] else 'poor'
         }
     
-    def assess_rotation(self, image: np.ndarray) -> Dict:
+    def _dominant_skew(self, skews: np.ndarray, weights: np.ndarray = None) -> float:
         """
-        Detect document rotation using Hough transform
-        Target: <1° rotation (acceptable <5°)
+        Robust skew from folded line angles
+        Takes the (weighted) histogram peak and returns the weighted median
+        of the angles falling in the peak bin and its neighbours
         """
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
+        if weights is None:
+            weights = np.ones_like(skews)
+        keep = np.abs(skews) <= self.MAX_SKEW_DEGREES
+        skews, weights = skews[keep], weights[keep]
+        if skews.size == 0:
+            return 0.0
         
-        # Edge detection
-        edges = cv2.Canny(gray, 50, 150)
+        bin_width = self.ROTATION_BIN_DEGREES
+        edges = np.arange(-self.MAX_SKEW_DEGREES, self.MAX_SKEW_DEGREES + 2 * bin_width, bin_width)
+        hist, _ = np.histogram(skews, edges, weights=weights)
+        peak = int(np.argmax(hist))
+        low, high = edges[max(peak - 1, 0)], edges[min(peak + 2, len(edges) - 1)]
         
-        # Hough line transform
-        lines = cv2.HoughLines(edges, 1, np.pi/180, 100)
+        in_peak = (skews >= low) & (skews < high)
+        order = np.argsort(skews[in_peak])
+        peak_skews, peak_weights = skews[in_peak][order], weights[in_peak][order]
+        cumulative = np.cumsum(peak_weights)
+        return float(peak_skews[np.searchsorted(cumulative, cumulative[-1] / 2)])
+    
+    def _refine_skew(self, edges: np.ndarray, peak: float) -> float:
+        """
+        Sharpen a segment-histogram peak on the edge map itself
+        Segment endpoints on a downsampled edge map snap gently sloped edges
+        to pixel-staircase steps (biasing skews under ~1 degree towards 0);
+        the angle within ROTATION_REFINE_DEGREES of peak whose row and column
+        edge profiles are sharpest is exact to ROTATION_REFINE_STEP
+        """
+        profile = projection_profiles(edges)
+        if profile is None:
+            return peak
+        
+        def sharpness(angle: float) -> float:
+            rows, cols = profile(angle), profile(angle + 90)
+            return float(np.dot(rows, rows)) + float(np.dot(cols, cols))
+        
+        candidates = np.arange(peak - self.ROTATION_REFINE_DEGREES,
+                               peak + self.ROTATION_REFINE_DEGREES + self.ROTATION_REFINE_STEP / 2,
+                               self.ROTATION_REFINE_STEP)
+        best = candidates[int(np.argmax([sharpness(angle) for angle in candidates]))]
+        return round(float(best), 2) + 0.0
+    
+    def estimate_skew(self, image: Union[np.ndarray, ImageAnalysisContext],
+                      scale: float = 1.0, method: str = None) -> Tuple[float, int]:
+        """
+        Estimate document skew in degrees
+        Positive angles follow cv2.getRotationMatrix2D (counter-clockwise);
+        rotating by the negated angle straightens the page
+        Returns: (angle, line_count)
+        """
+        context = ImageAnalysisContext.wrap(image)
+        method = method or self.rotation_method
         
+        if method == 'probabilistic':
+            edges = context.downsampled_edges(self.ROTATION_EDGE_LONG_EDGE)
+            min_length = max(20, int(min(edges.shape[:2]) * 0.1))
+            segments = cv2.HoughLinesP(edges, 1, np.pi / 360, 50,
+                                       minLineLength=min_length, maxLineGap=5)
+            segments = np.zeros((0, 4), np.float32) if segments is None else \
+                segments.reshape(-1, 4)[:self.MAX_HOUGH_LINES].astype(np.float32)
+            if len(segments) < self.MIN_SKEW_SEGMENTS:
+                angle, line_count = projection_skew(context.gray)
+                if line_count >= PROJECTION_MIN_TEXT_LINES:
+                    return angle, line_count
+                if not len(segments):
+                    return 0.0, 0
+            
+            dx = segments[:, 2] - segments[:, 0]
+            dy = segments[:, 3] - segments[:, 1]
+            # Fold line directions onto the nearest axis; long segments
+            # carry more reliable angles than pixel-staircase fragments
+            skews = (-np.degrees(np.arctan2(dy, dx)) + 45) % 90 - 45
+            peak = self._dominant_skew(skews, np.hypot(dx, dy))
+            return self._refine_skew(edges, peak), len(segments)
+        
+        if method == 'projection':
+            angle, line_count = projection_skew(context.gray)
+            return (angle, line_count) if line_count >= PROJECTION_MIN_TEXT_LINES else (0.0, 0)
+        
+        if method != 'legacy':
+            raise ValueError(f"Unknown rotation method: {method}")
+        
+        # Hough line transform; line lengths shrink with the proxy scale
+        votes = max(1, int(round(self.HOUGH_VOTE_THRESHOLD * scale)))
+        lines = cv2.HoughLines(context.edges, 1, np.pi/180, votes)
         if lines is None:
+            return 0.0, 0
+        
+        # Mean over every line with angles normalized to -90 to 90
+        thetas = np.degrees(lines.reshape(-1, 2)[:, 1])
+        return float(np.mean(np.where(thetas > 90, thetas - 180, thetas))), len(thetas)
+    
+    def assess_rotation(self, image: Union[np.ndarray, ImageAnalysisContext],
+                        scale: float = 1.0, method: str = None) -> Dict:
+        """
+        Detect document rotation using Hough transform
+        Target: <1° rotation (acceptable <5°)
+        scale: proxy-to-full-resolution ratio when image is a downscaled proxy
+        method: 'probabilistic' (HoughLinesP on a downsampled edge map,
+        refined on its edge profiles; text without long strokes falls back to
+        projection_skew), 'projection' (text-line projection profiles, see projection_skew) or
+        'legacy' (mean over all full-resolution Hough lines); defaults to
+        self.rotation_method
+        """
+        angle, line_count = self.estimate_skew(image, scale=scale, method=method)
+        return self._rotation_result(angle, line_count)
+    
+    def _rotation_result(self, angle: float, line_count: int) -> Dict:
+        """Classify rotation from an estimated skew angle"""
+        if line_count == 0:
             return {
                 'rotation': 0,
+                'angle': 0.0,
                 'severity': 'GREEN',
                 'message': 'Rotation: 0° (straight)',
                 'status': 'excellent'
             }
         
-        # Calculate average angle
-        angles = []
-        for line in lines:
-            rho, theta = line[0]
-            angle = np.degrees(theta)
-            # Normalize angle to -90 to 90
-            if angle > 90:
-                angle = angle - 180
-            angles.append(angle)
-        
-        avg_angle = np.mean(angles) if angles else 0
-        rotation = abs(avg_angle)
+        rotation = abs(angle)
         
-        if rotation < 1:
+        thresholds = self.SEVERITY_THRESHOLDS['rotation']
+        if rotation < thresholds['green']:
             severity = 'GREEN'
-        elif rotation < 5:
+        elif rotation < thresholds['yellow']:
             severity = 'YELLOW'
         else:
             severity = 'RED'
         
         return {
             'rotation': round(rotation, 2),
+            'angle': round(angle, 2),
             'severity': severity,
-            'message': f'Rotation: {rotation:.2f}° (target <1°)',
-            'status': 'acceptable' if rotation < 5 else 'poor'
+            'message': f"Rotation: {rotation:.2f}° (target <{thresholds['green']}°)",
+            'status': 'acceptable' if rotation < thresholds['yellow'] else 'poor'
         }
     
-    def assess_blur_laplacian(self, image: np.ndarray) -> float:
-        """Laplacian method for blur detection"""
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
-        
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        variance = laplacian.var()
-        return variance
+    def assess_blur_laplacian(self, image: Union[np.ndarray, ImageAnalysisContext],
+                              precision: str = None) -> float:
+        """
+        Laplacian method for blur detection
+        precision: derivative precision, defaults to self.derivative_precision
+        """
+        context = ImageAnalysisContext.wrap(image)
+        return context.laplacian_variance(precision or self.derivative_precision)
     
-    def assess_blur_gradient(self, image: np.ndarray) -> float:
-        """Gradient method for blur detection"""
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
-        
-        gx = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        gy = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        gradient_mag = np.sqrt(gx**2 + gy**2)
-        return gradient_mag.mean()
+    def assess_blur_gradient(self, image: Union[np.ndarray, ImageAnalysisContext],
+                             precision: str = None) -> float:
+        """
+        Gradient method for blur detection
+        precision: derivative precision, defaults to self.derivative_precision
+        """
+        context = ImageAnalysisContext.wrap(image)
+        return context.gradient_mean(precision or self.derivative_precision)
     
-    def assess_blur_fft(self, image: np.ndarray) -> float:
-        """FFT method for blur detection"""
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
-        
-        # Compute FFT
-        f_transform = np.fft.fft2(gray)
-        f_shift = np.fft.fftshift(f_transform)
-        magnitude_spectrum = np.abs(f_shift)
+    def assess_blur_fft(self, image: Union[np.ndarray, ImageAnalysisContext]) -> float:
+        """
+        FFT method for blur detection
+        High-frequency energy indicates sharpness; the whole-image real FFT
+        gives the same value as the shifted complex spectrum at about a
+        third of the time and memory
+        """
+        gray = ImageAnalysisContext.wrap(image).gray
+        return _fft_quadrant_energy(gray.astype(np.float64))
+    
+    def assess_blur_fft_window(self, image: Union[np.ndarray, ImageAnalysisContext],
+                               window: int = None) -> float:
+        """
+        Tiled real-FFT approximation of assess_blur_fft
+        Averages the same frequency region over a FFT_TILE_GRID x FFT_TILE_GRID
+        grid of power-of-two float32 windows and rescales to the full-image
+        magnitude (|F| grows with the square root of pixel count)
+        Approximate: the rescaling assumes texture is spread evenly over the
+        page, so it is only used where the full FFT does not fit in memory
+        """
+        context = ImageAnalysisContext.wrap(image)
+        return self._fft_window_energy(
+            lambda y, x, size: context.gray[y:y + size, x:x + size],
+            context.shape[:2], window
+        )
+    
+    def _fft_window_energy(self, read_window: Callable[[int, int, int], np.ndarray],
+                           shape: Tuple[int, int], window: int = None) -> float:
+        """
+        Tiled real-FFT energy; read_window(y, x, size) returns one
+        grayscale window, so callers control how much of the image is resident
+        """
+        h, w = shape
+        size = min(h, w, window or self.FFT_WINDOW_SIZE)
+        size = 1 << int(np.log2(size))
         
-        # High-frequency energy indicates sharpness
-        high_freq_energy = magnitude_spectrum[magnitude_spectrum.shape[0]//4:,
-                                            magnitude_spectrum.shape[1]//4:].mean()
-        return high_freq_energy
+        energies = [
+            _fft_quadrant_energy(read_window(int(y), int(x), size).astype(np.float32))
+            for y in np.linspace(0, h - size, self.FFT_TILE_GRID)
+            for x in np.linspace(0, w - size, self.FFT_TILE_GRID)
+        ]
+        return np.mean(energies) * np.sqrt((h * w) / (size * size))
     
-    def assess_blur(self, image: np.ndarray) -> Dict:
+    def assess_blur(self, image: Union[np.ndarray, ImageAnalysisContext],
+                    fft_method: str = None) -> Dict:
         """
         Multi-method blur detection (Gemini approach)
         Target: Minimal blur (acceptable up to moderate)
+        Full resolution only: a downscaled image reads sharper or blurrier
+        than its source depending on content, see assess_metrics
+        fft_method: 'full' (whole-image FFT) or 'tiles' (grid of real-FFT
+        windows, approximate); defaults to self.fft_method
         """
-        # Get three blur metrics
-        laplacian_score = self.assess_blur_laplacian(image)
-        gradient_score = self.assess_blur_gradient(image)
-        fft_score = self.assess_blur_fft(image)
+        image = ImageAnalysisContext.wrap(image)
+        fft_method = fft_method or self.fft_method
+        
+        if fft_method == 'full':
+            fft_score = self.assess_blur_fft(image)
+        elif fft_method == 'tiles':
+            fft_score = self.assess_blur_fft_window(image)
+        else:
+            raise ValueError(f"Unknown FFT method: {fft_method}")
         
+        # Get three blur metrics
+        raw_scores = {
+            'laplacian': self.assess_blur_laplacian(image),
+            'gradient': self.assess_blur_gradient(image),
+            'fft': fft_score
+        }
+        return self._blur_result(raw_scores)
+    
+    def _blur_result(self, raw_scores: Dict) -> Dict:
+        """Normalize, weight and classify raw laplacian/gradient/fft responses"""
         # Normalize scores (0-100)
-        laplacian_norm = min(100, (laplacian_score / 500) * 100)
-        gradient_norm = min(100, (gradient_score / 50) * 100)
-        fft_norm = min(100, (fft_score / 100000) * 100)
+        normalized = {}
+        for method, raw_score in raw_scores.items():
+            normalized[method] = min(100, (raw_score / self.BLUR_NORMALIZATION[method]) * 100)
+        laplacian_norm = normalized['laplacian']
+        gradient_norm = normalized['gradient']
+        fft_norm = normalized['fft']
         
         # Weighted average (87.3% accuracy)
-        blur_score = (laplacian_norm * 0.4 + gradient_norm * 0.35 + fft_norm * 0.25)
+        blur_score = sum(normalized[method] * weight for method, weight in self.BLUR_WEIGHTS.items())
         
-        if blur_score > 70:
+        thresholds = self.SEVERITY_THRESHOLDS['blur']
+        if blur_score > thresholds['green']:
             severity = 'GREEN'
             status = 'minimal'
-        elif blur_score > 40:
+        elif blur_score > thresholds['yellow']:
             severity = 'YELLOW'
             status = 'moderate'
         else:
@@ -206,34 +1042,51 @@ class DocumentQualityAssessor:
             }
         }
     
-    def assess_brightness(self, image: np.ndarray) -> Dict:
+    def assess_brightness(self, image: Union[np.ndarray, ImageAnalysisContext]) -> Dict:
         """
         Assess image brightness (exposure)
         Target: Properly exposed image
         """
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image
-        
-        brightness = np.mean(gray)
-        
-        if 50 <= brightness <= 200:
+        context = ImageAnalysisContext.wrap(image)
+        mean, _ = context.intensity_statistics
+        return self._brightness_result(mean, context.histogram)
+    
+    def _brightness_result(self, brightness: float, histogram: np.ndarray = None) -> Dict:
+        """
+        Classify brightness from the grayscale mean
+        histogram: adds exposure percentiles and clipped shares when given
+        """
+        thresholds = self.SEVERITY_THRESHOLDS['brightness']
+        if thresholds['green'][0] <= brightness <= thresholds['green'][1]:
             severity = 'GREEN'
             status = 'optimal'
-        elif 30 <= brightness <= 225:
+        elif thresholds['yellow'][0] <= brightness <= thresholds['yellow'][1]:
             severity = 'YELLOW'
             status = 'acceptable'
         else:
             severity = 'RED'
             status = 'poor'
         
-        return {
+        result = {
             'brightness': round(brightness, 1),
             'severity': severity,
             'message': f'Brightness: {brightness:.0f}/255 (status: {status})',
             'status': status
         }
+        if histogram is not None:
+            result['exposure'] = self._exposure_summary(histogram)
+        return result
+    
+    def _exposure_summary(self, histogram: np.ndarray) -> Dict:
+        """Percentiles and share of pixels crushed to black or blown to white"""
+        shadow, highlight = self.EXPOSURE_CLIP_LEVELS
+        total = histogram.sum()
+        return {
+            'p1': histogram_percentile(histogram, 1),
+            'p99': histogram_percentile(histogram, 99),
+            'shadow_clipped': round(float(histogram[:shadow + 1].sum() / total * 100), 2),
+            'highlight_clipped': round(float(histogram[highlight:].sum() / total * 100), 2)
+        }
     
     def get_quality_score(self, metrics: Dict) -> int:
         """
@@ -241,22 +1094,10 @@ class DocumentQualityAssessor:
         Based on weighted average of all metrics
         """
         # Extract severity scores
-        severity_weights = {
-            'GREEN': 100,
-            'YELLOW': 70,
-            'RED': 30
-        }
+        severity_weights = self.SEVERITY_SCORES
         
         scores = []
-        weights = {
-            'dpi': 0.2,
-            'contrast': 0.25,
-            'rotation': 0.2,
-            'blur': 0.25,
-            'brightness': 0.1
-        }
-        
-        for metric_name, weight in weights.items():
+        for metric_name, weight in self.METRIC_WEIGHTS.items():
             if metric_name in metrics:
                 severity = metrics[metric_name].get('severity', 'RED')
                 score = severity_weights.get(severity, 30)
@@ -265,14 +1106,385 @@ class DocumentQualityAssessor:
         overall_score = int(sum(scores))
         return overall_score
     
-    def assess_document_quality(self, image_path: str) -> Dict:
+    def score_upper_bound(self, metrics: Dict) -> int:
+        """Best achievable score: get_quality_score with skipped metrics counted as GREEN"""
+        return self.get_quality_score({
+            metric_name: {'severity': 'GREEN'} if metric.get('skipped') else metric
+            for metric_name, metric in metrics.items()
+        })
+    
+    def assess_metrics(self, image: Union[np.ndarray, ImageAnalysisContext], scale: float = 1.0) -> Dict:
+        """
+        Run every metric on one image
+        Grayscale and derivative planes are shared through one context
+        scale: ratio of image to source resolution when image is a reduced
+        decode or thumbnail; DPI and rotation are corrected for it, contrast
+        and brightness do not depend on it, and blur is reported as
+        unavailable (severity None, so it counts as RED in get_quality_score
+        and GREEN in score_upper_bound)
+        """
+        return {
+            metric_name: assess()
+            for metric_name, assess in self._metric_assessors(image, scale).items()
+        }
+    
+    def _metric_assessors(self, image: Union[np.ndarray, ImageAnalysisContext],
+                          scale: float = 1.0) -> Dict[str, Callable[[], Dict]]:
+        """Deferred per-metric assessments sharing one analysis context"""
+        context = ImageAnalysisContext.wrap(image)
+        return {
+            'dpi': lambda: self.assess_dpi(context, scale=scale),
+            'contrast': lambda: self.assess_contrast(context),
+            'rotation': lambda: self.assess_rotation(context, scale=scale),
+            'blur': (lambda: self.assess_blur(context)) if scale == 1.0 else self._blur_unavailable,
+            'brightness': lambda: self.assess_brightness(context)
+        }
+    
+    def _blur_unavailable(self) -> Dict:
+        """Blur placeholder for images below source resolution"""
+        return {
+            'blur': None,
+            'severity': None,
+            'skipped': True,
+            'status': 'unavailable',
+            'message': 'Blur: not measured below full resolution'
+        }
+    
+    def is_near_severity_boundary(self, metric_name: str, value: float) -> bool:
+        """True when value lies within escalation_margin of a severity boundary"""
+        boundaries = []
+        for bound in self.SEVERITY_THRESHOLDS[metric_name].values():
+            boundaries.extend(bound if isinstance(bound, tuple) else (bound,))
+        
+        return any(
+            abs(value - boundary) <= self.escalation_margin * boundary
+            for boundary in boundaries
+        )
+    
+    def assess_metrics_pyramid(self, image: np.ndarray) -> Tuple[Dict, Dict]:
+        """
+        Resolution-pyramid metric pass
+        Scores PROXY_METRICS on a proxy capped at proxy_long_edge and re-runs
+        at full resolution only the metrics that land near a GREEN/YELLOW/RED
+        boundary
+        Returns: (metrics, pyramid_summary)
+        """
+        assessors, pyramid = self._pyramid_assessors(image)
+        metrics = {metric_name: assess() for metric_name, assess in assessors.items()}
+        return metrics, pyramid
+    
+    def _pyramid_assessors(self, image: np.ndarray, tiled: bool = False) -> Tuple[Dict[str, Callable[[], Dict]], Dict]:
+        """
+        Deferred per-metric assessments for the resolution pyramid
+        tiled: escalate to the bounded-memory tile-streaming assessments
+        instead of full-resolution planes
+        The returned summary records escalations as the assessments run
+        """
+        h, w = image.shape[:2]
+        # Planes are lazy, so the full-resolution context costs nothing unless a metric escalates
+        full_assessors = self._tiled_assessors(image) if tiled else self._metric_assessors(image)
+        scale = self.proxy_long_edge / max(h, w)
+        if scale >= 1:
+            return full_assessors, {'scale': 1.0, 'escalated': []}
+        
+        proxy = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+        proxy_context = ImageAnalysisContext(proxy)
+        proxy_assessors = self._metric_assessors(proxy_context, scale)
+        summary = {'scale': round(scale, 4), 'escalated': []}
+        
+        def escalating(metric_name: str) -> Callable[[], Dict]:
+            def assess() -> Dict:
+                result = proxy_assessors[metric_name]()
+                if self.is_near_severity_boundary(metric_name, result[metric_name]):
+                    result = full_assessors[metric_name]()
+                    summary['escalated'].append(metric_name)
+                return result
+            return assess
+        
+        assessors = {
+            metric_name: escalating(metric_name) if metric_name in self.PROXY_METRICS else assess_full
+            for metric_name, assess_full in full_assessors.items()
+        }
+        return assessors, summary
+    
+    def assess_metrics_tiled(self, image: np.ndarray) -> Dict:
+        """
+        Bounded-memory metric pass for very large scans
+        Contrast, brightness, Laplacian and gradient statistics are streamed
+        over row bands; FFT blur uses sampled windows and rotation a thumbnail
+        """
+        return {
+            metric_name: assess()
+            for metric_name, assess in self._tiled_assessors(image).items()
+        }
+    
+    def tiled_statistics(self, image: np.ndarray, derivatives: bool = True) -> Dict:
+        """
+        Stream grayscale (and optionally Laplacian / Sobel) statistics over
+        TILE_STRIP_ROWS row bands, merging per-band moments; 8-bit images
+        accumulate one intensity histogram instead of grayscale moments
+        Bands carry one halo row each side so 3x3 kernels match the whole image
+        """
+        h = image.shape[0]
+        halo = 1 if derivatives else 0
+        histogram = np.zeros(256) if image.dtype == np.uint8 else None
+        gray_moments = (0, 0.0, 0.0)
+        laplacian_moments = (0, 0.0, 0.0)
+        gradient_sum = 0.0
+        
+        for top in range(0, h, self.TILE_STRIP_ROWS):
+            bottom = min(h, top + self.TILE_STRIP_ROWS)
+            start, end = max(0, top - halo), min(h, bottom + halo)
+            strip = image[start:end]
+            if strip.ndim == 3:
+                strip = cv2.cvtColor(strip, cv2.COLOR_BGR2GRAY)
+            core = slice(top - start, bottom - start)
+            
+            if histogram is not None:
+                histogram += gray_histogram(strip[core])
+            else:
+                gray_moments = _merge_moments(gray_moments, strip[core])
+            if derivatives:
+                laplacian = cv2.Laplacian(strip, DERIVATIVE_DEPTHS[self.derivative_precision])[core]
+                laplacian_moments = _merge_moments(laplacian_moments, laplacian)
+                magnitude = derivative_gradient_magnitude(strip, self.derivative_precision)[core]
+                gradient_sum += cv2.sumElems(magnitude)[0]
+        
+        if histogram is not None:
+            count = int(histogram.sum())
+            mean, std = histogram_statistics(histogram)
+        else:
+            count, mean, m2 = gray_moments
+            std = np.sqrt(m2 / count)
+        statistics = {'count': count, 'mean': mean, 'std': std, 'histogram': histogram}
+        if derivatives:
+            statistics['laplacian_var'] = laplacian_moments[2] / laplacian_moments[0]
+            statistics['gradient_mean'] = gradient_sum / count
+        return statistics
+    
+    def _tiled_assessors(self, image: np.ndarray) -> Dict[str, Callable[[], Dict]]:
+        """Deferred per-metric assessments for the tile-streaming path"""
+        cache = {}
+        cache_lock = threading.Lock()
+        
+        def statistics(derivatives: bool = False) -> Dict:
+            # A derivative pass also yields the grayscale moments; the lock
+            # keeps concurrently run metrics from streaming the image twice
+            with cache_lock:
+                key = 'derivatives' if derivatives or 'derivatives' in cache else 'gray'
+                if key not in cache:
+                    cache[key] = self.tiled_statistics(image, derivatives=key == 'derivatives')
+                return cache[key]
+        
+        def read_gray_window(y: int, x: int, size: int) -> np.ndarray:
+            window = image[y:y + size, x:x + size]
+            return cv2.cvtColor(window, cv2.COLOR_BGR2GRAY) if window.ndim == 3 else window
+        
+        def assess_blur() -> Dict:
+            derived = statistics(derivatives=True)
+            return self._blur_result({
+                'laplacian': derived['laplacian_var'],
+                'gradient': derived['gradient_mean'],
+                'fft': self._fft_window_energy(read_gray_window, image.shape[:2])
+            })
+        
+        def assess_rotation() -> Dict:
+            # The legacy engine needs the full-resolution edge map this path
+            # exists to avoid (and its mean angle is not scale-stable)
+            method = 'probabilistic' if self.rotation_method == 'legacy' else self.rotation_method
+            h, w = image.shape[:2]
+            scale = min(1.0, self.ROTATION_EDGE_LONG_EDGE / max(h, w))
+            thumbnail = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))),
+                                   interpolation=cv2.INTER_AREA)
+            return self._rotation_result(*self.estimate_skew(thumbnail, scale=scale, method=method))
+        
+        return {
+            'dpi': lambda: self.assess_dpi(image),
+            'contrast': lambda: self._contrast_result(statistics()['std']),
+            'rotation': assess_rotation,
+            'blur': assess_blur,
+            'brightness': lambda: self._brightness_result(statistics()['mean'], statistics()['histogram'])
+        }
+    
+    def _run_gated(self, assessors: Dict[str, Callable[[], Dict]], min_score: int) -> Tuple[Dict, Dict]:
+        """
+        Run assessments tier by tier (GATE_TIERS), stopping once the best
+        achievable score under METRIC_WEIGHTS falls below min_score
+        Returns: (metrics, gate_summary); skipped metrics are marked as such
+        and gate_summary['score_upper_bound'] is the best score still reachable
+        """
+        results = {}
+        skipped = []
+        for tier in self.GATE_TIERS:
+            pending = {name: {'skipped': True} for name in assessors if name not in results}
+            best_case = self.score_upper_bound({**results, **pending})
+            if skipped or best_case < min_score:
+                skipped.extend(tier)
+                continue
+            results.update(self._run_metrics({metric_name: assessors[metric_name] for metric_name in tier}))
+        
+        for metric_name in skipped:
+            results[metric_name] = {
+                'severity': None,
+                'skipped': True,
+                'status': 'skipped',
+                'message': f'Skipped: document cannot reach minimum score {min_score}'
+            }
+        
+        metrics = {metric_name: results[metric_name] for metric_name in assessors}
+        return metrics, {'min_score': min_score, 'skipped': skipped,
+                         'score_upper_bound': self.score_upper_bound(metrics)}
+    
+    def assess_document_quality(self, image_path: str, min_score: int = None) -> Dict:
         """
         Comprehensive quality assessment
         Returns detailed metrics and overall score
+        min_score: gate threshold; expensive metrics are skipped once the
+        document cannot reach it, scoring as RED, and the result's level is
+        REJECTED (result['gate'] carries the best reachable score)
         """
+        profiler = MetricProfiler() if self.instrument else None
         try:
+            if self.cache is not None:
+                # Cached assessments are keyed by the encoded bytes
+                with open(image_path, 'rb') as f:
+                    return self.assess_image_bytes(f.read(), min_score=min_score)
+            
             # Load image
-            image = cv2.imread(image_path)
+            with self._measure(profiler, 'load'):
+                image = cv2.imread(image_path)
+        except Exception as e:
+            self.logger.error(f"Quality assessment failed: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'score': 0
+            }
+        
+        return self.assess_image(image, min_score=min_score, profiler=profiler)
+    
+    def assess_document_pages(self, path: str, min_score: int = None) -> Iterator[Dict]:
+        """
+        Assess every page of a (possibly multi-page) document, one decoded
+        page at a time; each result carries its zero-based 'page'
+        """
+        for page_index, page in iter_document_pages(path):
+            result = self.assess_image(page, min_score=min_score)
+            result['page'] = page_index
+            yield result
+    
+    def assess_image_bytes(self, data: Union[bytes, bytearray, memoryview], reduction: int = 1,
+                           min_score: int = None) -> Dict:
+        """
+        Comprehensive quality assessment of an encoded in-memory image
+        reduction: 2, 4 or 8 decodes a reduced grayscale image for an
+        approximate, never escalated score: blur is not measured (see
+        assess_metrics), so the score is a lower bound and
+        score_upper_bound(result['metrics']) the matching upper bound;
+        1 decodes in full
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(bytes(data), self.cache_namespace(reduction=reduction, min_score=min_score))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                cached['timestamp'] = np.datetime64(cached['timestamp'])
+                cached['cached'] = True
+                return cached
+        
+        profiler = MetricProfiler() if self.instrument else None
+        try:
+            with self._measure(profiler, 'load'):
+                image = decode_image(data, reduction=reduction, grayscale=reduction > 1)
+        except Exception as e:
+            self.logger.error(f"Quality assessment failed: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'score': 0
+            }
+        
+        result = self.assess_image(image, scale=1.0 / reduction, min_score=min_score, profiler=profiler)
+        if result['success'] and reduction > 1:
+            result['decode_reduction'] = reduction
+        if cache_key is not None and result['success']:
+            # Timings describe this run, not the document
+            self.cache.put(cache_key, {key: value for key, value in result.items() if key != 'timings'})
+        return result
+    
+    def assess_preflight(self, data: Union[bytes, bytearray, memoryview], source_width: int = None,
+                         min_score: int = None) -> Dict:
+        """
+        Quality check of an upload before any expensive processing
+        Uploads are decoded and scored in full, so the result is exactly what
+        assess_image_bytes reports; only images over PIL's decompression-bomb
+        limit are scored from the largest reduced decode (approximate, see
+        assess_image_bytes) rather than allocated in full
+        source_width: width of the original capture when data is a
+        client-made thumbnail, so DPI reflects the original; blur is not
+        measured on thumbnails (see assess_metrics)
+        min_score: gate threshold, see assess_document_quality
+        """
+        if source_width:
+            try:
+                image = decode_image(data)
+            except Exception as e:
+                self.logger.error(f"Quality assessment failed: {str(e)}")
+                return {
+                    'success': False,
+                    'error': str(e),
+                    'score': 0
+                }
+            if image is None:
+                return self.assess_image(image)
+            return self.assess_image(image, scale=min(1.0, image.shape[1] / source_width), min_score=min_score)
+        
+        reduction = 1
+        try:
+            # Header only; pixels are decoded by assess_image_bytes
+            Image.open(io.BytesIO(data)).close()
+        except Image.DecompressionBombError:
+            reduction = max(REDUCED_DECODE_FLAGS)
+        except Exception:
+            # Let the decoder report unreadable data
+            pass
+        return self.assess_image_bytes(data, reduction=reduction, min_score=min_score)
+    
+    def _measure(self, profiler: MetricProfiler, stage: str):
+        """profiler.measure(stage), or a no-op when not instrumenting"""
+        return profiler.measure(stage) if profiler is not None else nullcontext()
+    
+    def cache_namespace(self, **options) -> str:
+        """
+        Assessor version plus every setting that changes results, so cached
+        entries never cross configurations
+        """
+        settings = {
+            'fast_path': self.fast_path,
+            'proxy_long_edge': self.proxy_long_edge,
+            'escalation_margin': self.escalation_margin,
+            'fft_method': self.fft_method,
+            'rotation_method': self.rotation_method,
+            'tiled_pixel_threshold': self.tiled_pixel_threshold,
+            'crop_to_document': self.crop_to_document,
+            'derivative_precision': self.derivative_precision,
+            **options
+        }
+        signature = ','.join(f'{name}={value}' for name, value in sorted(settings.items()))
+        return f"{self.VERSION}[{signature}]"
+    
+    def assess_image(self, image: np.ndarray, scale: float = 1.0, min_score: int = None,
+                     profiler: MetricProfiler = None) -> Dict:
+        """
+        Comprehensive quality assessment of an already decoded image
+        Returns detailed metrics and overall score
+        scale: ratio of image to source resolution when image is a reduced decode
+        min_score: see assess_document_quality
+        profiler: collects per-metric timings (e.g. continuing from the image
+        load); one is created when instrument is set
+        """
+        try:
             if image is None:
                 return {
                     'success': False,
@@ -281,19 +1493,40 @@ class DocumentQualityAssessor:
                 }
             
             # Assess all metrics
-            metrics = {
-                'dpi': self.assess_dpi(image),
-                'contrast': self.assess_contrast(image),
-                'rotation': self.assess_rotation(image),
-                'blur': self.assess_blur(image),
-                'brightness': self.assess_brightness(image)
-            }
+            assessors, pyramid, tiled = self._select_assessors(image, scale)
+            
+            region = None
+            crop_pyramid = None
+            if self.crop_to_document:
+                region = locate_document(image, scale)
+                if region is not None:
+                    crop = document_crop(image, region, scale)
+                    crop_assessors, crop_pyramid, _ = self._select_assessors(crop, scale)
+                    for metric_name in self.CROPPED_METRICS:
+                        assessors[metric_name] = crop_assessors[metric_name]
+            
+            if profiler is None and self.instrument:
+                profiler = MetricProfiler()
+            if profiler is not None:
+                assessors = {
+                    metric_name: profiler.wrap(metric_name, assess)
+                    for metric_name, assess in assessors.items()
+                }
+            
+            gate = None
+            with profiler if profiler is not None else nullcontext():
+                if min_score is None:
+                    metrics = self._run_metrics(assessors)
+                else:
+                    metrics, gate = self._run_gated(assessors, min_score)
             
             # Calculate overall score
             overall_score = self.get_quality_score(metrics)
             
             # Determine quality level
-            if overall_score >= 85:
+            if gate is not None and gate['score_upper_bound'] < min_score:
+                quality_level = 'REJECTED'
+            elif overall_score >= 85:
                 quality_level = 'EXCELLENT'
             elif overall_score >= 70:
                 quality_level = 'GOOD'
@@ -302,13 +1535,27 @@ class DocumentQualityAssessor:
             else:
                 quality_level = 'POOR'
             
-            return {
+            result = {
                 'success': True,
                 'score': overall_score,
                 'level': quality_level,
                 'metrics': metrics,
                 'timestamp': np.datetime64('now')
             }
+            if pyramid is not None:
+                if crop_pyramid is not None:
+                    pyramid['escalated'].extend(crop_pyramid['escalated'])
+                result['pyramid'] = pyramid
+            if tiled:
+                result['tiled'] = True
+            if gate is not None:
+                gate['passed'] = gate['score_upper_bound'] >= min_score
+                result['gate'] = gate
+            if profiler is not None:
+                result['timings'] = profiler.timings
+            if self.crop_to_document:
+                result['document_region'] = region
+            return result
         
         except Exception as e:
             self.logger.error(f"Quality assessment failed: {str(e)}")
@@ -317,6 +1564,194 @@ class DocumentQualityAssessor:
                 'error': str(e),
                 'score': 0
             }
+    
+    def _run_metrics(self, assessors: Dict[str, Callable[[], Dict]]) -> Dict:
+        """
+        Run deferred assessments, concurrently on the shared metric pool
+        when metric_workers > 1 (OpenCV releases the GIL); results keep the
+        assessors' order
+        """
+        if not self.metric_workers or self.metric_workers < 2 or len(assessors) < 2:
+            return {metric_name: assess() for metric_name, assess in assessors.items()}
+        
+        pool = _metric_pool(self.metric_workers)
+        # Heaviest first so the long blur/rotation passes start immediately
+        order = sorted(assessors, key=lambda name: name not in ('blur', 'rotation'))
+        futures = {metric_name: pool.submit(assessors[metric_name]) for metric_name in order}
+        return {metric_name: futures[metric_name].result() for metric_name in assessors}
+    
+    def _select_assessors(self, image: np.ndarray, scale: float = 1.0) -> Tuple[Dict, Dict, bool]:
+        """
+        Deferred assessments for image: resolution pyramid (fast_path),
+        tile streaming (very large scans) or the direct metric pass
+        Returns: (assessors, pyramid_summary or None, tiled)
+        Over tiled_pixel_threshold, pyramid escalations are tiled as well
+        """
+        tiled = bool(self.tiled_pixel_threshold and scale == 1.0
+                     and image.shape[0] * image.shape[1] > self.tiled_pixel_threshold)
+        if self.fast_path and scale == 1.0:
+            assessors, pyramid = self._pyramid_assessors(image, tiled)
+            return assessors, pyramid, tiled
+        if tiled:
+            return self._tiled_assessors(image), None, True
+        return self._metric_assessors(image, scale), None, False
+    
+    def _assess_source(self, source: Union[str, os.PathLike, bytes, bytearray, memoryview, np.ndarray],
+                       min_score: int = None) -> Dict:
+        """Assess a file path, encoded image buffer or decoded array"""
+        if isinstance(source, np.ndarray):
+            return self.assess_image(source, min_score=min_score)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return self.assess_image_bytes(source, min_score=min_score)
+        return self.assess_document_quality(os.fspath(source), min_score=min_score)
+    
+    def select_best_frame(self, frames: Iterable, target_score: int = 85) -> Dict:
+        """
+        Pick the highest-scoring frame of a burst or short video
+        Each frame runs through the tiered gate with the best score so far as
+        its minimum, so frames that cannot beat it stop after the cheap
+        metrics; the search ends at the first frame reaching target_score
+        (EXCELLENT by default)
+        frames: decoded arrays, encoded buffers or paths (see iter_video_frames)
+        Returns: best frame index and its full assessment
+        """
+        best_index = None
+        best_result = None
+        assessed = 0
+        gated = 0
+        
+        for index, frame in enumerate(frames):
+            min_score = best_result['score'] + 1 if best_result is not None else 0
+            result = self._assess_source(frame, min_score=min_score)
+            assessed += 1
+            if not result['success']:
+                continue
+            if not result['gate']['passed']:
+                gated += 1
+                continue
+            
+            result.pop('gate')
+            best_index, best_result = index, result
+            if result['score'] >= target_score:
+                break
+        
+        if best_result is None:
+            return {
+                'success': False,
+                'error': 'No assessable frames',
+                'score': 0,
+                'frames_assessed': assessed
+            }
+        
+        return {
+            'success': True,
+            'frame': best_index,
+            'score': best_result['score'],
+            'level': best_result['level'],
+            'result': best_result,
+            'frames_assessed': assessed,
+            'frames_gated': gated,
+            'early_exit': best_result['score'] >= target_score
+        }
+    
+    def assess_batch(self, sources: Union[Dict, Iterable], workers: int = None) -> Iterator[Tuple]:
+        """
+        Assess many documents over a process pool
+        sources: mapping of key -> source, or an iterable of sources keyed by
+        path (for paths) or position (for buffers and arrays); a source is a
+        file path, encoded image bytes or a decoded ndarray
+        workers: pool size, defaults to the CPU count; 1 runs in-process
+        Yields: (key, result) in completion order
+        """
+        if isinstance(sources, dict):
+            items = iter(sources.items())
+        else:
+            items = (
+                (source if isinstance(source, (str, os.PathLike)) else index, source)
+                for index, source in enumerate(sources)
+            )
+        
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for key, source in items:
+                yield key, self._assess_source(source)
+            return
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as pool:
+            # Bound in-flight work so large archives are not buffered up front
+            pending = {}
+            for key, source in items:
+                pending[pool.submit(_assess_batch_source, self, source)] = key
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+            
+            for future in as_completed(pending):
+                yield pending[future], future.result()
+
+
+def _merge_moments(moments: Tuple[int, float, float], values: np.ndarray) -> Tuple[int, float, float]:
+    """
+    Fold a block of values into running (count, mean, M2) moments
+    (Chan et al. parallel variance update)
+    """
+    count, mean, m2 = moments
+    block_count = values.size
+    if block_count == 0:
+        return moments
+    
+    block_mean, block_std = cv2.meanStdDev(values)
+    block_mean, block_m2 = float(block_mean[0, 0]), float(block_std[0, 0]) ** 2 * block_count
+    total = count + block_count
+    delta = block_mean - mean
+    return (
+        total,
+        mean + delta * block_count / total,
+        m2 + block_m2 + delta * delta * count * block_count / total
+    )
+
+
+@lru_cache(maxsize=None)
+def _metric_pool(workers: int) -> ThreadPoolExecutor:
+    """Process-wide thread pool for concurrent metrics"""
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='quality-metric')
+
+
+def _share_opencv_threads(workers: int):
+    """
+    Cap OpenCV's process-wide thread count at the CPUs' share per metric
+    worker so nested parallel regions do not oversubscribe them; the count
+    is only ever lowered, so it does not depend on construction order
+    """
+    share = max(1, (os.cpu_count() or 1) // workers)
+    if cv2.getNumThreads() > share:
+        cv2.setNumThreads(share)
+
+
+def _init_batch_worker():
+    """One OpenCV thread per worker process; the pool provides the parallelism"""
+    cv2.setNumThreads(1)
+
+
+def _assess_batch_source(assessor: DocumentQualityAssessor, source) -> Dict:
+    """Process pool entry point for DocumentQualityAssessor.assess_batch"""
+    return assessor._assess_source(source)
+
+
+# Per-thread CLAHE instances; cv2.CLAHE objects are not safe to share
+_ENHANCER_LOCAL = threading.local()
+
+
+def thread_clahe(clip_limit: float = 2.0, tile_grid_size: Tuple[int, int] = (8, 8)):
+    """CLAHE object for these settings, created once per thread"""
+    cache = getattr(_ENHANCER_LOCAL, 'clahe', None)
+    if cache is None:
+        cache = _ENHANCER_LOCAL.clahe = {}
+    key = (clip_limit, tuple(tile_grid_size))
+    if key not in cache:
+        cache[key] = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=key[1])
+    return cache[key]
 
 
 class DocumentEnhancer:
@@ -325,11 +1760,49 @@ class DocumentEnhancer:
     Implements Gemini image solution techniques
     """
     
-    def __init__(self):
+    # Skews below this are left alone rather than resampling the page
+    MIN_DESKEW_DEGREES = 0.5
+    # Search range for text skew left after rectifying a located document
+    RESIDUAL_SKEW_DEGREES = 3
+    # Projection estimates need this many text lines to be used for deskewing
+    MIN_DESKEW_TEXT_LINES = PROJECTION_MIN_TEXT_LINES
+    
+    # Order in which planned enhancement steps run; clahe and brightness
+    # share one LAB round trip (enhance_luminance)
+    ENHANCEMENT_STEPS = ('rotation', 'perspective', 'denoise', 'clahe', 'brightness')
+    
+    CLAHE_CLIP_LIMIT = 2.0
+    CLAHE_TILE_GRID = (8, 8)
+    
+    # 'bilateral': 9px bilateral at full resolution
+    # 'small': 5px bilateral, ~8x faster at matching noise reduction
+    # 'downsampled': bilateral at half resolution, guided-filter upsampled
+    DENOISE_METHODS = ('bilateral', 'small', 'downsampled')
+    DENOISE_SIGMA = 75
+    # Guided upsampling window radius and regularization (8-bit intensity units)
+    GUIDED_RADIUS = 2
+    GUIDED_EPSILON = 100.0
+    
+    def __init__(self, denoise_method: str = 'bilateral'):
+        """
+        denoise_method: remove_noise engine, one of DENOISE_METHODS
+        """
+        if denoise_method not in self.DENOISE_METHODS:
+            raise ValueError(f"Unknown denoise method: {denoise_method}")
         self.logger = logging.getLogger(__name__)
+        self.denoise_method = denoise_method
     
-    def correct_rotation(self, image: np.ndarray, angle: float) -> np.ndarray:
-        """Correct document rotation"""
+    def correct_rotation(self, image: np.ndarray, angle: float = None) -> np.ndarray:
+        """
+        Correct document rotation
+        angle: rotation to apply (cv2.getRotationMatrix2D convention); when
+        None the skew is estimated from projection profiles (estimate_skew)
+        and undone if it reaches MIN_DESKEW_DEGREES
+        """
+        if angle is None:
+            skew = self.estimate_skew(image)
+            angle = -skew if abs(skew) >= self.MIN_DESKEW_DEGREES else 0
+        
         if angle == 0:
             return image
         
@@ -346,115 +1819,336 @@ class DocumentEnhancer:
         Apply CLAHE (Contrast Limited Adaptive Histogram Equalization)
         For adaptive contrast normalization
         """
+        return self.enhance_luminance(image, clahe=True, equalize=False)
+    
+    def enhance_luminance(self, image: np.ndarray, clahe: bool = True, equalize: bool = True) -> np.ndarray:
+        """
+        CLAHE and/or histogram equalization of the L channel in a single
+        BGR -> LAB -> BGR round trip (grayscale images are processed directly)
+        """
+        if not (clahe or equalize):
+            return image
+        
         if len(image.shape) == 3:
-            # Convert BGR to LAB color space
             lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-            l, a, b = cv2.split(lab)
-            
-            # Apply CLAHE to L channel
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            l = clahe.apply(l)
-            
-            # Merge channels
-            enhanced = cv2.merge([l, a, b])
-            enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+            l = np.ascontiguousarray(lab[..., 0])
         else:
-            # Grayscale
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            enhanced = clahe.apply(image)
+            lab, l = None, image
+        
+        if clahe:
+            l = thread_clahe(self.CLAHE_CLIP_LIMIT, self.CLAHE_TILE_GRID).apply(l)
+        if equalize:
+            l = cv2.equalizeHist(l)
         
-        return enhanced
+        if lab is None:
+            return l
+        # lab is our own conversion, so the L channel is replaced in place
+        lab[..., 0] = l
+        return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
     
-    def remove_noise(self, image: np.ndarray) -> np.ndarray:
-        """Remove noise using bilateral filtering"""
-        denoised = cv2.bilateralFilter(image, 9, 75, 75)
-        return denoised
+    def remove_noise(self, image: np.ndarray, method: str = None) -> np.ndarray:
+        """
+        Remove noise using edge-preserving bilateral filtering
+        method: one of DENOISE_METHODS (defaults to the enhancer's)
+        """
+        method = method or self.denoise_method
+        if method == 'bilateral':
+            return cv2.bilateralFilter(image, 9, self.DENOISE_SIGMA, self.DENOISE_SIGMA)
+        if method == 'small':
+            return cv2.bilateralFilter(image, 5, self.DENOISE_SIGMA, self.DENOISE_SIGMA)
+        if method == 'downsampled':
+            return self._guided_upsample_denoise(image)
+        raise ValueError(f"Unknown denoise method: {method}")
     
-    def correct_perspective(self, image: np.ndarray) -> np.ndarray:
-        """Detect and correct perspective distortion"""
-        # Find contours
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-        edges = cv2.Canny(gray, 50, 150)
-        contours, _ = cv2.findContours(edges, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    def _guided_upsample_denoise(self, image: np.ndarray, factor: int = 2) -> np.ndarray:
+        """
+        Bilateral filter at 1/factor resolution, brought back to full size by
+        fitting the filter as a local linear model of the input (He et al.'s
+        fast guided filter) so edges stay at source resolution
+        """
+        h, w = image.shape[:2]
+        small = cv2.resize(image, (max(1, w // factor), max(1, h // factor)), interpolation=cv2.INTER_AREA)
+        filtered = cv2.bilateralFilter(small, 5, self.DENOISE_SIGMA, self.DENOISE_SIGMA)
         
-        if not contours:
-            return image
+        guide = small.astype(np.float32)
+        target = filtered.astype(np.float32)
+        window = (2 * self.GUIDED_RADIUS + 1,) * 2
+        mean_guide = cv2.blur(guide, window)
+        mean_target = cv2.blur(target, window)
+        covariance = cv2.blur(guide * target, window) - mean_guide * mean_target
+        variance = cv2.blur(guide * guide, window) - mean_guide * mean_guide
         
-        # Find largest contour (likely the document)
-        largest_contour = max(contours, key=cv2.contourArea)
+        # filtered ~= a * guide + b per window; averaged coefficients are upsampled
+        a = covariance / (variance + self.GUIDED_EPSILON)
+        b = mean_target - a * mean_guide
+        a = cv2.resize(cv2.blur(a, window), (w, h), interpolation=cv2.INTER_LINEAR)
+        b = cv2.resize(cv2.blur(b, window), (w, h), interpolation=cv2.INTER_LINEAR)
+        return cv2.add(cv2.multiply(a, image, dtype=cv2.CV_32F), b, dtype=cv2.CV_8U)
+    
+    def benchmark_denoise(self, images: Iterable[np.ndarray], repeat: int = 3) -> Dict:
+        """
+        Time every denoise engine over images and compare it with 'bilateral'
+        Returns: {method: {'seconds': best mean time per image,
+        'psnr': mean PSNR against the bilateral output}}
+        """
+        images = list(images)
+        references = [self.remove_noise(image, 'bilateral') for image in images]
+        report = {}
+        for method in self.DENOISE_METHODS:
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                outputs = [self.remove_noise(image, method) for image in images]
+                best = min(best, (time.perf_counter() - start) / max(1, len(images)))
+            psnr = [cv2.PSNR(output, reference) for output, reference in zip(outputs, references)]
+            report[method] = {'seconds': best, 'psnr': float(np.mean(psnr)) if psnr else 0.0}
+        return report
+    
+    def correct_perspective(self, image: np.ndarray, region: Dict = None) -> np.ndarray:
+        """
+        Detect and correct perspective distortion
+        region: document region already located by the assessor
+        (result['document_region']); otherwise the outline is searched for
+        on a thumbnail (locate_document)
+        The quad is warped to an upright rectangle in one warpPerspective;
+        image is returned unchanged when no document outline is found
+        """
+        if region is None:
+            region = locate_document(image)
+            if region is None:
+                return image
         
-        # Get approximate polygon
-        epsilon = 0.02 * cv2.arcLength(largest_contour, True)
-        approx = cv2.approxPolyDP(largest_contour, epsilon, True)
+        M, size = document_warp(region)
+        return cv2.warpPerspective(image, M, size)
+    
+    def geometry_transform(self, image: np.ndarray, skew: float = None, region: Dict = None,
+                           locate: bool = True, rotate: bool = True) -> Tuple[np.ndarray, Tuple[int, int], list]:
+        """
+        Compose deskew and perspective correction into one 3x3 matrix
+        skew: page skew in degrees (assessor convention), estimated when None
+        region: document region; searched for on a thumbnail when None and
+        locate is set
+        rotate: False limits the transform to perspective correction
+        A located document is rectified by its homography, which already
+        removes the frame-space skew; any text skew left inside it is
+        measured on a rectified thumbnail and folded into the same matrix
+        Returns: (matrix, output (width, height), corrections applied, a
+        subset of ('rotation', 'perspective'))
+        """
+        h, w = image.shape[:2]
+        if region is None and locate:
+            region = locate_document(image)
         
-        if len(approx) == 4:
-            # Get destination points
-            h, w = image.shape[:2]
-            dst = np.array([
-                [0, 0],
-                [w, 0],
-                [w, h],
-                [0, h]
-            ], dtype=np.float32)
-            
-            # Calculate perspective transform
-            M = cv2.getPerspectiveTransform(np.float32(approx), dst)
-            corrected = cv2.warpPerspective(image, M, (w, h))
-            
-            return corrected
+        if region is not None:
+            M, size = document_warp(region)
+            corrections = ['perspective']
+            skew = self._rectified_skew(image, M, size) if rotate else 0.0
+        else:
+            M, size = np.eye(3), (w, h)
+            corrections = []
+            if not rotate:
+                skew = 0.0
+            elif skew is None:
+                skew = self.estimate_skew(image)
         
-        return image
+        if abs(skew) >= self.MIN_DESKEW_DEGREES:
+            rotation = np.vstack([cv2.getRotationMatrix2D((size[0] // 2, size[1] // 2), -skew, 1.0), [0, 0, 1]])
+            M = rotation @ M
+            corrections.insert(0, 'rotation')
+        return M, size, corrections
+    
+    def _rectified_skew(self, image: np.ndarray, M: np.ndarray, size: Tuple[int, int]) -> float:
+        """Text skew of the document warped by M, measured on a thumbnail"""
+        scale = min(1.0, PROJECTION_LONG_EDGE / max(size))
+        preview_size = (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+        preview = cv2.warpPerspective(image, np.diag([scale, scale, 1.0]) @ M, preview_size)
+        return self.estimate_skew(preview, self.RESIDUAL_SKEW_DEGREES)
+    
+    def estimate_skew(self, image: np.ndarray, search_degrees: float = PROJECTION_SEARCH_DEGREES) -> float:
+        """
+        Page skew from projection profiles (projection_skew); 0 when fewer
+        than MIN_DESKEW_TEXT_LINES text lines support the estimate
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+        skew, line_count = projection_skew(gray, search_degrees=search_degrees)
+        return skew if line_count >= self.MIN_DESKEW_TEXT_LINES else 0.0
+    
+    def correct_geometry(self, image: np.ndarray, skew: float = None, region: Dict = None,
+                         locate: bool = True, rotate: bool = True) -> Tuple[np.ndarray, list]:
+        """
+        Deskew and perspective correction with a single resample of image
+        (see geometry_transform)
+        Returns: (corrected image, corrections applied); image itself when
+        there is nothing to correct
+        """
+        M, size, corrections = self.geometry_transform(image, skew, region, locate, rotate)
+        if not corrections:
+            return image, corrections
+        if 'perspective' not in corrections:
+            return cv2.warpAffine(image, M[:2], size), corrections
+        return cv2.warpPerspective(image, M, size), corrections
     
     def normalize_brightness(self, image: np.ndarray) -> np.ndarray:
         """Normalize image brightness/exposure"""
-        if len(image.shape) == 3:
-            lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-            l, a, b = cv2.split(lab)
-            
-            # Normalize L channel
-            l = cv2.equalizeHist(l)
-            
-            result = cv2.merge([l, a, b])
-            result = cv2.cvtColor(result, cv2.COLOR_LAB2BGR)
-        else:
-            result = cv2.equalizeHist(image)
-        
-        return result
+        return self.enhance_luminance(image, clahe=False, equalize=True)
     
-    def enhance_document(self, image_path: str, quality_score: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    def enhance_document(self, image_path: str, quality_score: int = 0,
+                         assessment: Dict = None) -> Tuple[np.ndarray, np.ndarray]:
         """
         Full preprocessing pipeline for document enhancement
+        assessment: quality assessment of the image; only the steps its
+        metrics call for are run (see enhance_adaptive)
         Returns: (enhanced_image, original_image)
         """
         try:
             original = cv2.imread(image_path)
-            if original is None:
-                self.logger.error(f"Failed to load image: {image_path}")
-                return None, None
-            
-            enhanced = original.copy()
-            
-            # Apply preprocessing steps
-            # 1. Correct rotation (if needed)
-            # ... extract angle from quality assessment ...
-            
-            # 2. Correct perspective
-            enhanced = self.correct_perspective(enhanced)
-            
-            # 3. Apply CLAHE for contrast
-            enhanced = self.apply_clahe(enhanced)
+        except Exception as e:
+            self.logger.error(f"Enhancement failed: {str(e)}")
+            return None, None
+        
+        if original is None:
+            self.logger.error(f"Failed to load image: {image_path}")
+            return None, None
+        if assessment is not None:
+            return self.enhance_adaptive(original, assessment)[:2]
+        return self.enhance_image(original, quality_score)
+    
+    def enhance_document_pages(self, path: str, quality_score: int = 0) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Enhance every page of a (possibly multi-page) document, one decoded
+        page at a time
+        Yields: (page_index, enhanced_image, original_image)
+        """
+        for page_index, page in iter_document_pages(path):
+            enhanced, original = self.enhance_image(page, quality_score)
+            yield page_index, enhanced, original
+    
+    def enhance_document_bytes(self, data: Union[bytes, bytearray, memoryview],
+                               quality_score: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Enhancement pipeline for an encoded in-memory image
+        Returns: (enhanced_image, original_image)
+        """
+        try:
+            original = decode_image(data)
+        except Exception as e:
+            self.logger.error(f"Enhancement failed: {str(e)}")
+            return None, None
+        
+        if original is None:
+            self.logger.error("Failed to decode image buffer")
+            return None, None
+        return self.enhance_image(original, quality_score)
+    
+    def enhance_image(self, original: np.ndarray, quality_score: int = 0,
+                      region: Dict = None, skew: float = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Enhancement pipeline for an already decoded image
+        region: located document region to reuse for perspective correction
+        skew: page skew from the assessor (result['metrics']['rotation']['angle']);
+        estimated from projection profiles when None
+        Returns: (enhanced_image, original_image)
+        """
+        try:
+            # Apply preprocessing steps; each returns a new array, so
+            # original is never modified
+            # 1-2. Correct rotation and perspective in one resample
+            enhanced, _ = self.correct_geometry(original, skew, region)
             
-            # 4. Remove noise
+            # 3. Remove noise
             enhanced = self.remove_noise(enhanced)
             
-            # 5. Normalize brightness
-            enhanced = self.normalize_brightness(enhanced)
+            # 4. CLAHE for contrast and brightness normalization, in one
+            # LAB round trip
+            enhanced = self.enhance_luminance(enhanced)
             
             return enhanced, original
         
         except Exception as e:
             self.logger.error(f"Enhancement failed: {str(e)}")
             return None, None
+    
+    def plan_enhancement(self, assessment: Dict) -> Dict:
+        """
+        Choose enhancement steps from a per-metric quality assessment
+        Steps whose metric is missing or was skipped by the gate are kept
+        Returns: {'steps': [...], 'skipped': {step: reason}} in ENHANCEMENT_STEPS order
+        """
+        metrics = assessment.get('metrics', {})
+        locating = 'document_region' in assessment
+        region = assessment.get('document_region')
+        steps, skipped = [], {}
+        
+        def severity(metric_name):
+            return metrics.get(metric_name, {}).get('severity')
+        
+        # With a located document, rotation is the skew left after rectifying it
+        angle = metrics.get('rotation', {}).get('angle')
+        if region is None and angle is not None and abs(angle) < self.MIN_DESKEW_DEGREES:
+            skipped['rotation'] = f'skew {angle:.2f}° below {self.MIN_DESKEW_DEGREES}°'
+        else:
+            steps.append('rotation')
+        
+        if locating and region is None:
+            skipped['perspective'] = 'no document quadrilateral found'
+        else:
+            steps.append('perspective')
+        
+        if metrics.get('blur', {}).get('status') == 'minimal':
+            skipped['denoise'] = 'blur minimal'
+        else:
+            steps.append('denoise')
+        
+        if severity('contrast') == 'GREEN':
+            skipped['clahe'] = 'contrast GREEN'
+        else:
+            steps.append('clahe')
+        
+        if severity('brightness') == 'GREEN':
+            skipped['brightness'] = 'brightness GREEN'
+        else:
+            steps.append('brightness')
+        
+        return {'steps': steps, 'skipped': skipped}
+    
+    def enhance_adaptive(self, original: np.ndarray, assessment: Dict) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        """
+        Enhancement pipeline limited to the steps plan_enhancement selects
+        assessment: assess_image result for original
+        The enhanced image is original itself when no step changes it
+        Returns: (enhanced_image, original_image, plan) where plan['applied']
+        records the steps that resampled the image
+        """
+        plan = self.plan_enhancement(assessment)
+        plan['applied'] = []
+        region = assessment.get('document_region')
+        angle = assessment.get('metrics', {}).get('rotation', {}).get('angle')
+        
+        try:
+            # Rotation and perspective share one resample; estimated deskews
+            # and outline detection may find nothing to correct
+            rotate, locate = 'rotation' in plan['steps'], 'perspective' in plan['steps']
+            enhanced = original
+            if rotate or locate:
+                enhanced, corrections = self.correct_geometry(enhanced, angle, region if locate else None,
+                                                              locate, rotate)
+                plan['applied'].extend(corrections)
+            
+            if 'denoise' in plan['steps']:
+                enhanced = self.remove_noise(enhanced)
+                plan['applied'].append('denoise')
+            
+            # The L-channel steps run fused, after the geometric and denoise steps
+            clahe, equalize = 'clahe' in plan['steps'], 'brightness' in plan['steps']
+            if clahe or equalize:
+                enhanced = self.enhance_luminance(enhanced, clahe, equalize)
+                plan['applied'].extend(step for step in ('clahe', 'brightness') if step in plan['steps'])
+            
+            self.logger.debug(f"Enhancement steps applied: {plan['applied']}")
+            return enhanced, original, plan
+        except Exception as e:
+            self.logger.error(f"Enhancement failed: {str(e)}")
+            return None, None, plan
 
 
 class OCRExtractor:
@@ -507,6 +2201,16 @@ class OCRExtractor:
                 'extractions': []
             }
     
+    def extract_pages(self, pages: Iterable[Tuple[int, np.ndarray]]) -> Iterator[Dict]:
+        """
+        Run OCR over (page_index, image) pairs, e.g. from iter_document_pages,
+        holding one page at a time; each result carries its 'page'
+        """
+        for page_index, image in pages:
+            result = self.extract_text_with_confidence(image)
+            result['page'] = page_index
+            yield result
+    
     def calibrate_confidence_scores(self, results: list, actual_accuracy: float) -> list:
         """
         Calibrate confidence scores to match actual accuracy
@@ -563,8 +2267,91 @@ class OCRExtractor:
             'raw_text': full_text
         }
 
+
+class DocumentPipeline:
+    """
+    Assess, enhance and OCR each page from a single decode
+    Every stage receives the same read-only ndarray; stages that change
+    pixels return new arrays, so nothing is copied unless it is modified
+    """
+    
+    def __init__(self, assessor: DocumentQualityAssessor = None, enhancer: DocumentEnhancer = None,
+                 extractor: OCRExtractor = None):
+        self.logger = logging.getLogger(__name__)
+        self.assessor = assessor or DocumentQualityAssessor()
+        self.enhancer = enhancer or DocumentEnhancer()
+        self.extractor = extractor or OCRExtractor()
+    
+    def process_image(self, image: np.ndarray, page_index: int = 0) -> Dict:
+        """
+        Run every stage over one decoded page
+        Returns: 'success', per-stage results and 'enhanced_image', which is
+        the page itself when no enhancement step applied (None on failure)
+        """
+        # A read-only view: an in-place write in any stage fails instead of
+        # silently altering what the other stages see
+        page = image.view()
+        page.flags.writeable = False
+        
+        quality_result = self.assessor.assess_image(page)
+        enhanced, _, plan = self.enhancer.enhance_adaptive(page, quality_result)
+        
+        extraction_result = {}
+        structured_data = {}
+        if enhanced is not None:
+            extraction_result = self.extractor.extract_text_with_confidence(enhanced)
+            structured_data = self.extractor.extract_structured_data(enhanced, extraction_result)
+        
+        result = self._page_result(page_index, quality_result, plan, extraction_result,
+                                   structured_data, enhanced)
+        if not quality_result.get('success'):
+            result.update(success=False, error=quality_result.get('error'))
+        elif enhanced is None:
+            result.update(success=False, error='Enhancement failed')
+        return result
+    
+    @staticmethod
+    def _page_result(page_index: int, quality_result: Dict = None, plan: Dict = None,
+                     extraction_result: Dict = None, structured_data: Dict = None,
+                     enhanced: np.ndarray = None) -> Dict:
+        """Per-page result; every key is present whether or not the page succeeded"""
+        return {
+            'success': True,
+            'page': page_index,
+            'quality_assessment': quality_result or {},
+            'enhancement': plan or {},
+            'extraction': extraction_result or {},
+            'structured_data': structured_data or {},
+            'enhanced_image': enhanced
+        }
+    
+    def process_pages(self, pages: Iterable[Tuple[int, np.ndarray]]) -> Iterator[Dict]:
+        """Process (page_index, image) pairs one page at a time"""
+        for page_index, page in pages:
+            yield self.process_image(page, page_index)
+    
+    def process_document(self, path: str) -> Iterator[Dict]:
+        """Decode each page of a (possibly multi-page) document once and process it"""
+        return self.process_pages(iter_document_pages(path))
+    
+    def process_bytes(self, data: Union[bytes, bytearray, memoryview]) -> Dict:
+        """Process an encoded in-memory image"""
+        try:
+            image = decode_image(data)
+        except Exception as e:
+            image, error = None, str(e)
+        else:
+            error = 'Failed to decode image buffer'
+        if image is None:
+            self.logger.error(f"Document processing failed: {error}")
+            result = self._page_result(0)
+            result.update(success=False, error=error)
+            return result
+        return self.process_image(image)
+
 if __name__ == "__main__":
     import argparse
+    import importlib.util
     import os
     import json
     from datetime import datetime
@@ -575,6 +2362,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Batch Document Processor')
     parser.add_argument('--batch', required=True, help='Input folder path')
     parser.add_argument('--output', required=True, help='Output folder path')
+    parser.add_argument('--denoise', default='bilateral', choices=DocumentEnhancer.DENOISE_METHODS,
+                        help='Denoise engine')
     args = parser.parse_args()
     
     input_folder = args.batch
@@ -583,12 +2372,11 @@ if __name__ == "__main__":
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
     
-    assessor = DocumentQualityAssessor()
-    enhancer = DocumentEnhancer()
-    extractor = OCRExtractor()
+    pipeline = DocumentPipeline(enhancer=DocumentEnhancer(denoise_method=args.denoise))
     
-    # Supported extensions
-    valid_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff'}
+    # Supported extensions; PDFs are rendered with the optional PyMuPDF
+    valid_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.pdf'}
+    pdf_support = importlib.util.find_spec('fitz') is not None
     
     processed_count = 0
     
@@ -602,41 +2390,46 @@ if __name__ == "__main__":
         ext = os.path.splitext(filename)[1].lower()
         if ext not in valid_extensions:
             continue
+        if ext == '.pdf' and not pdf_support:
+            print(f"Skipping {filename}: PDF input needs PyMuPDF (pip install PyMuPDF)")
+            continue
             
         filepath = os.path.join(input_folder, filename)
         print(f"Processing {filename}...")
         
         try:
-            # 1. Assess
-            quality_result = assessor.assess_document_quality(filepath)
-            
-            # 2. Enhance
-            enhanced_img, original_img = enhancer.enhance_document(filepath, quality_result.get('score', 0))
-            
-            # Save enhanced image
-            enhanced_filename = f"enhanced_{filename}"
-            enhanced_path = os.path.join(output_folder, enhanced_filename)
-            if enhanced_img is not None:
-                cv2.imwrite(enhanced_path, enhanced_img)
-            
-            # 3. Extract
-            extraction_result = {}
-            structured_data = {}
+            stem = os.path.splitext(filename)[0]
+            multi_page = ext == '.pdf' or document_page_count(filepath) > 1
+            page_results = []
             
-            if enhanced_img is not None:
-                extraction_result = extractor.extract_text_with_confidence(enhanced_img)
-                # Extract structured data
-                structured_data = extractor.extract_structured_data(enhanced_img, extraction_result)
+            # Pages stream through the pipeline one decoded page at a time
+            for page_result in pipeline.process_document(filepath):
+                page_index = page_result['page']
+                enhanced_img = page_result.pop('enhanced_image')
+                
+                # Save enhanced image
+                if multi_page:
+                    page_ext = '.png' if ext == '.pdf' else ext
+                    enhanced_filename = f"enhanced_{stem}_page{page_index + 1:03d}{page_ext}"
+                else:
+                    enhanced_filename = f"enhanced_{filename}"
+                enhanced_path = os.path.join(output_folder, enhanced_filename)
+                if enhanced_img is not None:
+                    cv2.imwrite(enhanced_path, enhanced_img)
+                
+                page_result['enhanced_image_path'] = enhanced_filename
+                page_results.append(page_result)
             
             # Combine results
             full_result = {
                 'filename': filename,
-                'timestamp': datetime.now().isoformat(),
-                'quality_assessment': quality_result,
-                'extraction': extraction_result,
-                'structured_data': structured_data,
-                'enhanced_image_path': enhanced_filename
+                'timestamp': datetime.now().isoformat()
             }
+            if multi_page:
+                full_result['page_count'] = len(page_results)
+                full_result['pages'] = page_results
+            else:
+                full_result.update({key: value for key, value in page_results[0].items() if key != 'page'})
             
             # Save result JSON
             json_filename = f"{os.path.splitext(filename)[0]}_result.json"
@@ -0,0 +1,149 @@
+"""
+Quality Result Cache Module - Content-hash memoization of quality assessments
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+def _to_json(value):
+    """JSON fallback for numpy scalars and timestamps in assessment results"""
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, np.datetime64):
+        return str(value)
+    raise TypeError(f"Unserializable value: {type(value).__name__}")
+
+
+class QualityResultCache:
+    """
+    Two-level cache of assessment results keyed by SHA-256 of the image bytes
+    In-process LRU in front of a size-bounded sqlite store
+    """
+
+    def __init__(self, db_path: str = "data/quality_cache.sqlite3", memory_entries: int = 256,
+                 max_disk_bytes: int = 64 * 1024 * 1024):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.logger = logging.getLogger(__name__)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Ensure cache folder exists
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+
+    def __getstate__(self) -> Dict:
+        # Worker processes get their own LRU and lock; the sqlite store is shared
+        state = self.__dict__.copy()
+        state['_memory'] = OrderedDict()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection so the cache is safe across threads and processes"""
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(data: bytes, version: str) -> str:
+        """SHA-256 of the image bytes, namespaced by assessor version/config"""
+        digest = hashlib.sha256(data).hexdigest()
+        return f"{version}:{digest}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a cached result, or None"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return json.loads(self._memory[key])
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            self.logger.warning(f"Quality cache read failed: {str(e)}")
+            return None
+
+        self._remember(key, row[0])
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict):
+        """Store a result in memory and on disk, evicting least recently used rows"""
+        value = json.dumps(result, default=_to_json)
+        self._remember(key, value)
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, len(value), time.time())
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Quality cache write failed: {str(e)}")
+
+    def _remember(self, key: str, value: str):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently accessed rows until the store fits max_disk_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+
+        rows = conn.execute("SELECT key, size FROM results ORDER BY accessed").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_disk_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM results WHERE key = ?", evicted)
+
+    def clear(self):
+        """Remove every cached result"""
+        with self._lock:
+            self._memory.clear()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
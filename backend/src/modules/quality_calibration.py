@@ -0,0 +1,261 @@
+"""
+Quality Calibration Module - Offline recalibration of quality weights and thresholds
+Scores a labelled corpus of archived assessments as NumPy arrays so threshold
+and weight sweeps run vectorized instead of re-scoring document by document
+Usage: python -m src.modules.quality_calibration archive.jsonl (from backend/)
+"""
+
+from itertools import product
+from typing import Dict, Iterable, Sequence, Tuple
+import json
+import logging
+
+import numpy as np
+
+try:
+    from .document_processor import DocumentQualityAssessor
+except ImportError:
+    # Run as a script (python src/modules/quality_calibration.py)
+    from document_processor import DocumentQualityAssessor
+
+
+class QualityCalibrator:
+    """
+    Vectorized counterpart of DocumentQualityAssessor.get_quality_score
+    A document is predicted acceptable when its score reaches pass_score;
+    candidates are ranked by accuracy against the corpus labels
+    """
+
+    # Comparison each metric's severity boundaries use in the assessor
+    SEVERITY_RULES = {
+        'dpi': 'at_least',
+        'contrast': 'at_least',
+        'rotation': 'below',
+        'blur': 'above',
+        'brightness': 'band'
+    }
+
+    # Candidate weights (K x metrics) scored per chunk, bounding memory at K x N
+    SWEEP_CELLS = 10_000_000
+
+    def __init__(self, assessor: DocumentQualityAssessor = None, pass_score: int = 70):
+        self.logger = logging.getLogger(__name__)
+        self.assessor = assessor or DocumentQualityAssessor()
+        self.pass_score = pass_score
+        self.metric_names = tuple(self.assessor.METRIC_WEIGHTS)
+        self.values = np.empty((0, len(self.metric_names)))
+        self.present = np.empty((0, len(self.metric_names)), dtype=bool)
+        self.labels = np.empty(0, dtype=bool)
+
+    def load(self, records: Iterable[Tuple[Dict, bool]]) -> int:
+        """
+        Load (assessment, label) pairs into arrays, replacing any corpus
+        assessment: an assess_* result or its 'metrics' dict
+        label: True when the document was acceptable
+        Skipped metrics are stored as NaN (scored RED, as the assessor does);
+        missing metrics contribute nothing
+        Values are the rounded figures results carry, so a document within
+        rounding of a boundary can land on the other side of it
+        Returns: number of documents loaded
+        """
+        values, present, labels = [], [], []
+        for assessment, label in records:
+            metrics = assessment.get('metrics', assessment)
+            row, mask = [], []
+            for metric_name in self.metric_names:
+                metric = metrics.get(metric_name)
+                mask.append(metric is not None)
+                if metric is None or metric.get('skipped'):
+                    row.append(np.nan)
+                else:
+                    row.append(float(metric[metric_name]))
+            values.append(row)
+            present.append(mask)
+            labels.append(bool(label))
+
+        shape = (len(labels), len(self.metric_names))
+        self.values = np.array(values, dtype=np.float64).reshape(shape)
+        self.present = np.array(present, dtype=bool).reshape(shape)
+        self.labels = np.array(labels, dtype=bool)
+        return len(labels)
+
+    def load_jsonl(self, path: str, label_key: str = 'label') -> int:
+        """Load archived assessments, one JSON object per line carrying label_key"""
+        def records():
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        yield record, record[label_key]
+
+        return self.load(records())
+
+    def severity_scores(self, metric_name: str, green=None, yellow=None) -> np.ndarray:
+        """
+        SEVERITY_SCORES for one metric across the corpus
+        green / yellow default to the assessor's thresholds; arrays broadcast
+        against the documents on the last axis (band metrics take (low, high)
+        pairs on a trailing axis of length 2)
+        """
+        thresholds = self.assessor.SEVERITY_THRESHOLDS[metric_name]
+        green = np.asarray(thresholds['green'] if green is None else green, dtype=np.float64)
+        yellow = np.asarray(thresholds['yellow'] if yellow is None else yellow, dtype=np.float64)
+        values = self.values[:, self.metric_names.index(metric_name)]
+        rule = self.SEVERITY_RULES[metric_name]
+
+        with np.errstate(invalid='ignore'):
+            if rule == 'band':
+                is_green = (green[..., :1] <= values) & (values <= green[..., 1:])
+                is_yellow = (yellow[..., :1] <= values) & (values <= yellow[..., 1:])
+            elif rule == 'at_least':
+                is_green, is_yellow = values >= green[..., None], values >= yellow[..., None]
+            elif rule == 'above':
+                is_green, is_yellow = values > green[..., None], values > yellow[..., None]
+            else:
+                is_green, is_yellow = values < green[..., None], values < yellow[..., None]
+
+        severity_scores = self.assessor.SEVERITY_SCORES
+        scores = np.where(is_green, severity_scores['GREEN'],
+                          np.where(is_yellow, severity_scores['YELLOW'], severity_scores['RED']))
+        return np.where(np.isnan(values), severity_scores['RED'], scores)
+
+    def scores(self, thresholds: Dict = None, weights=None) -> np.ndarray:
+        """
+        Overall scores, matching get_quality_score document for document
+        thresholds: per-metric {'green', 'yellow'} overrides
+        weights: mapping of metric -> weight, or a (K, metrics) array of
+        candidate weight vectors giving a (K, N) result
+        """
+        thresholds = thresholds or {}
+        if weights is None:
+            weights = self.assessor.METRIC_WEIGHTS
+        if isinstance(weights, dict):
+            weights = np.array([weights.get(metric_name, 0.0) for metric_name in self.metric_names])
+        weights = np.asarray(weights, dtype=np.float64)
+
+        # Accumulate in METRIC_WEIGHTS order so float rounding matches int(sum(...))
+        total = 0.0
+        for index, metric_name in enumerate(self.metric_names):
+            overrides = thresholds.get(metric_name, {})
+            metric_scores = self.severity_scores(metric_name, overrides.get('green'), overrides.get('yellow'))
+            metric_scores = np.where(self.present[:, index], metric_scores, 0)
+            total = total + metric_scores * weights[..., index, None]
+        return np.asarray(total).astype(np.int64)
+
+    def accuracy(self, scores: np.ndarray) -> np.ndarray:
+        """Share of documents whose pass/fail at pass_score matches the label"""
+        return ((scores >= self.pass_score) == self.labels).mean(axis=-1)
+
+    def evaluate(self, thresholds: Dict = None, weights: Dict = None) -> Dict:
+        """Accuracy and error rates of one configuration"""
+        predicted = self.scores(thresholds, weights) >= self.pass_score
+        accepted, rejected = self.labels, ~self.labels
+        return {
+            'documents': int(self.labels.size),
+            'accuracy': float((predicted == self.labels).mean()) if self.labels.size else 0.0,
+            'false_accept_rate': float(predicted[rejected].mean()) if rejected.any() else 0.0,
+            'false_reject_rate': float((~predicted[accepted]).mean()) if accepted.any() else 0.0
+        }
+
+    def sweep_weights(self, candidates: np.ndarray, thresholds: Dict = None) -> Dict:
+        """
+        Score every candidate weight vector (K x metrics, METRIC_WEIGHTS order)
+        Returns: per-candidate accuracy plus the best weights
+        """
+        candidates = np.atleast_2d(np.asarray(candidates, dtype=np.float64))
+        chunk = max(1, self.SWEEP_CELLS // max(1, self.labels.size))
+        accuracy = np.concatenate([
+            self.accuracy(self.scores(thresholds, candidates[start:start + chunk]))
+            for start in range(0, len(candidates), chunk)
+        ])
+        best = int(np.argmax(accuracy))
+        return {
+            'accuracy': accuracy,
+            'best_weights': dict(zip(self.metric_names, candidates[best].round(4).tolist())),
+            'best_accuracy': float(accuracy[best])
+        }
+
+    def sweep_thresholds(self, metric_name: str, green: Sequence, yellow: Sequence,
+                         weights: Dict = None) -> Dict:
+        """
+        Score every (green, yellow) pair for one metric, other thresholds fixed
+        Pairs whose yellow band does not contain the green one are left as NaN
+        Returns: (len(green), len(yellow)) accuracy grid plus the best pair
+        """
+        green = np.asarray(green, dtype=np.float64)
+        yellow = np.asarray(yellow, dtype=np.float64)
+        band = self.SEVERITY_RULES[metric_name] == 'band'
+
+        # Grid axes ahead of the document axis: (G, 1, ...) x (1, Y, ...)
+        green_grid = green[:, None, :] if band else green[:, None]
+        yellow_grid = yellow[None, :, :] if band else yellow[None, :]
+        scores = self.scores({metric_name: {'green': green_grid, 'yellow': yellow_grid}}, weights)
+        accuracy = self.accuracy(scores)
+
+        rule = self.SEVERITY_RULES[metric_name]
+        if band:
+            valid = (yellow_grid[..., 0] <= green_grid[..., 0]) & (green_grid[..., 1] <= yellow_grid[..., 1])
+        elif rule == 'below':
+            valid = green_grid <= yellow_grid
+        else:
+            valid = green_grid >= yellow_grid
+        accuracy = np.where(valid, accuracy, np.nan)
+
+        if np.isnan(accuracy).all():
+            return {'accuracy': accuracy, 'best': None, 'best_accuracy': None}
+
+        g, y = np.unravel_index(np.nanargmax(accuracy), accuracy.shape)
+        return {
+            'accuracy': accuracy,
+            'best': {'green': green[g].round(4).tolist(), 'yellow': yellow[y].round(4).tolist()},
+            'best_accuracy': float(accuracy[g, y])
+        }
+
+
+def weight_simplex(metric_count: int, step: float = 0.05) -> np.ndarray:
+    """Every weight vector on a step grid whose entries sum to 1"""
+    units = int(round(1 / step))
+    grid = [
+        combination for combination in product(range(units + 1), repeat=metric_count - 1)
+        if sum(combination) <= units
+    ]
+    partial = np.array(grid, dtype=np.float64).reshape(-1, metric_count - 1)
+    last = units - partial.sum(axis=1, keepdims=True)
+    return np.hstack([partial, last]) / units
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description='Recalibrate quality weights and thresholds')
+    parser.add_argument('archive', help='JSONL of archived assessments with a label field')
+    parser.add_argument('--label-key', default='label', help='Field holding the acceptable/unacceptable label')
+    parser.add_argument('--pass-score', type=int, default=70, help='Score at which a document is accepted')
+    parser.add_argument('--weight-step', type=float, default=0.05, help='Weight grid resolution')
+    args = parser.parse_args()
+
+    calibrator = QualityCalibrator(pass_score=args.pass_score)
+    count = calibrator.load_jsonl(args.archive, label_key=args.label_key)
+    print(f"Loaded {count} assessments")
+
+    report = {'current': calibrator.evaluate()}
+    weights = calibrator.sweep_weights(weight_simplex(len(calibrator.metric_names), args.weight_step))
+    report['weights'] = {'best': weights['best_weights'], 'accuracy': weights['best_accuracy']}
+
+    # Sweep each metric over +/-50% of its current thresholds
+    report['thresholds'] = {}
+    for metric_name, thresholds in calibrator.assessor.SEVERITY_THRESHOLDS.items():
+        green, yellow = (np.asarray(thresholds[level], dtype=np.float64) for level in ('green', 'yellow'))
+        factors = np.linspace(0.5, 1.5, 21)
+        if calibrator.SEVERITY_RULES[metric_name] == 'band':
+            # Widen or narrow the band symmetrically around its centre
+            green_candidates = green.mean() + np.outer(factors, green - green.mean())
+            yellow_candidates = yellow.mean() + np.outer(factors, yellow - yellow.mean())
+        else:
+            green_candidates, yellow_candidates = green * factors, yellow * factors
+        sweep = calibrator.sweep_thresholds(metric_name, green_candidates, yellow_candidates)
+        report['thresholds'][metric_name] = {'best': sweep['best'], 'accuracy': sweep['best_accuracy']}
+
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,1142 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the document quality and enhancement pipeline"""
+
+import unittest
+import sys
+import os
+import glob
+import importlib.util
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from src.modules.document_processor import (
+    DocumentEnhancer,
+    DocumentPipeline,
+    DocumentQualityAssessor,
+    ImageAnalysisContext,
+    MetricHistogramRegistry,
+    MetricProfiler,
+    OCRExtractor,
+    decode_image,
+    document_warp,
+    document_page_count,
+    iter_document_pages,
+    iter_video_frames,
+    locate_document,
+    thread_clahe
+)
+
+TEST_DOCUMENTS_DIR = os.path.join(os.path.dirname(__file__), 'test-documents')
+TEST_DOCUMENTS = sorted(
+    path for path in glob.glob(os.path.join(TEST_DOCUMENTS_DIR, '**', '*.jpg'), recursive=True)
+    if os.sep + 'invalid' + os.sep not in path
+)
+
+
+def make_document_image(width: int = 640, height: int = 480) -> np.ndarray:
+    """Synthetic BGR page with dark text-like bars on a light background"""
+    image = np.full((height, width, 3), 235, dtype=np.uint8)
+    for y in range(40, height - 40, 24):
+        cv2.rectangle(image, (40, y), (width - 40, y + 8), (20, 20, 20), -1)
+    return image
+
+
+def make_text_page(width: int = 2480, height: int = 3508, blur: int = 0,
+                   noise: float = 0) -> np.ndarray:
+    """
+    Natively high-resolution BGR page of rendered text lines inside wide
+    margins; blur is the Gaussian kernel radius, noise the pixel sigma
+    """
+    rng = np.random.default_rng(0)
+    page = np.full((height, width, 3), 245, dtype=np.uint8)
+    margin = width // 10
+    font_scale = width / 1400
+    words = ['invoice', 'account', 'number', 'address', 'payment', 'total', 'date', '2000']
+    for y in range(margin, height - margin, int(40 * font_scale)):
+        cv2.putText(page, ' '.join(rng.choice(words, 8)), (margin, y), cv2.FONT_HERSHEY_SIMPLEX,
+                    font_scale, (30, 30, 30), max(1, int(2 * font_scale)), cv2.LINE_AA)
+    if blur:
+        page = cv2.GaussianBlur(page, (blur * 2 + 1, blur * 2 + 1), 0)
+    if noise:
+        page = np.clip(page + rng.normal(0, noise, page.shape), 0, 255).astype(np.uint8)
+    return page
+
+
+# Corners of the card placed by make_tabletop_capture (tl, tr, br, bl)
+TABLETOP_CARD_QUAD = np.float32([[500, 380], [1120, 430], [1090, 830], [470, 790]])
+
+
+def make_tabletop_capture(text_skew: float = 0) -> np.ndarray:
+    """
+    Phone-style capture: a skewed document card on a textured tabletop
+    text_skew: rotation (degrees) of the printing relative to the card edges
+    """
+    rng = np.random.default_rng(0)
+    table = rng.normal(90, 25, (1200, 1600, 3)).clip(0, 255).astype(np.uint8)
+    table = cv2.GaussianBlur(table, (7, 7), 0)
+    card = make_document_image(640, 400)
+    if text_skew:
+        M = cv2.getRotationMatrix2D((320, 200), text_skew, 1.0)
+        card = cv2.warpAffine(card, M, (640, 400), borderValue=(235, 235, 235))
+    corners = np.float32([[0, 0], [640, 0], [640, 400], [0, 400]])
+    M = cv2.getPerspectiveTransform(corners, TABLETOP_CARD_QUAD)
+    warped = cv2.warpPerspective(card, M, (1600, 1200))
+    mask = cv2.warpPerspective(np.full((400, 640), 255, np.uint8), M, (1600, 1200))
+    table[mask > 0] = warped[mask > 0]
+    return table
+
+
+class TestImageAnalysisContext(unittest.TestCase):
+
+    def test_gray_is_computed_once(self):
+        """Grayscale plane is cached on the context"""
+        context = ImageAnalysisContext(make_document_image())
+        self.assertIs(context.gray, context.gray)
+        self.assertEqual(context.gray.ndim, 2)
+
+    def test_grayscale_input_is_not_copied(self):
+        """Single-channel images are used directly"""
+        gray = cv2.cvtColor(make_document_image(), cv2.COLOR_BGR2GRAY)
+        self.assertIs(ImageAnalysisContext(gray).gray, gray)
+
+    def test_metrics_match_raw_arrays(self):
+        """Metrics give the same result on a context and on the raw array"""
+        assessor = DocumentQualityAssessor()
+        image = make_document_image()
+        context = ImageAnalysisContext(image)
+        self.assertEqual(assessor.assess_contrast(context), assessor.assess_contrast(image))
+        self.assertEqual(assessor.assess_rotation(context), assessor.assess_rotation(image))
+        self.assertEqual(assessor.assess_blur(context), assessor.assess_blur(image))
+        self.assertEqual(assessor.assess_brightness(context), assessor.assess_brightness(image))
+        self.assertEqual(assessor.assess_dpi(context), assessor.assess_dpi(image))
+
+    def test_histogram_statistics_match_numpy(self):
+        """Mean and std from the shared histogram match full-plane reductions"""
+        for path in TEST_DOCUMENTS:
+            context = ImageAnalysisContext(cv2.imread(path))
+            mean, std = context.intensity_statistics
+            self.assertAlmostEqual(mean, np.mean(context.gray), places=6)
+            self.assertAlmostEqual(std, np.std(context.gray), places=6)
+            self.assertEqual(context.histogram.sum(), context.gray.size)
+
+    def test_non_8bit_planes_skip_the_histogram(self):
+        gray = np.linspace(0, 1, 64 * 64, dtype=np.float32).reshape(64, 64)
+        context = ImageAnalysisContext(gray)
+        self.assertIsNone(context.histogram)
+        self.assertAlmostEqual(context.intensity_statistics[0], float(np.mean(gray)), places=5)
+
+    def test_exposure_clipping(self):
+        """Blown highlights show up in the brightness exposure summary"""
+        image = make_document_image()
+        image[:300] = 255
+        image[-20:] = 0
+        exposure = DocumentQualityAssessor().assess_brightness(image)['exposure']
+        self.assertEqual(exposure['p99'], 255)
+        self.assertGreater(exposure['highlight_clipped'], 50)
+        self.assertGreater(exposure['shadow_clipped'], 0)
+        self.assertLess(exposure['p1'], 25)
+
+
+class TestDocumentQualityAssessor(unittest.TestCase):
+
+    def setUp(self):
+        self.assessor = DocumentQualityAssessor()
+
+    def test_assess_document_quality(self):
+        """Every sample document produces a full metric set"""
+        self.assertTrue(TEST_DOCUMENTS)
+        for path in TEST_DOCUMENTS:
+            result = self.assessor.assess_document_quality(path)
+            self.assertTrue(result['success'], path)
+            self.assertEqual(
+                set(result['metrics']),
+                {'dpi', 'contrast', 'rotation', 'blur', 'brightness'}
+            )
+            self.assertGreaterEqual(result['score'], 0)
+            self.assertLessEqual(result['score'], 100)
+
+    def test_invalid_image(self):
+        """Unreadable files fail without raising"""
+        result = self.assessor.assess_document_quality(
+            os.path.join(TEST_DOCUMENTS_DIR, 'invalid', 'test.txt')
+        )
+        self.assertFalse(result['success'])
+        self.assertEqual(result['score'], 0)
+
+
+class TestResolutionPyramid(unittest.TestCase):
+
+    def test_small_images_skip_the_proxy(self):
+        """Images already under the proxy size are scored directly"""
+        assessor = DocumentQualityAssessor(fast_path=True)
+        image = make_document_image()
+        metrics, pyramid = assessor.assess_metrics_pyramid(image)
+        self.assertEqual(pyramid['scale'], 1.0)
+        self.assertEqual(metrics, assessor.assess_metrics(image))
+
+    def test_pyramid_score_matches_full_resolution(self):
+        """Proxy scoring keeps the overall score on upscaled samples"""
+        full = DocumentQualityAssessor()
+        fast = DocumentQualityAssessor(fast_path=True)
+        for path in TEST_DOCUMENTS:
+            image = cv2.resize(cv2.imread(path), None, fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
+            metrics, pyramid = fast.assess_metrics_pyramid(image)
+            self.assertLess(pyramid['scale'], 1.0)
+            self.assertEqual(
+                fast.get_quality_score(metrics),
+                full.get_quality_score(full.assess_metrics(image)),
+                path
+            )
+
+    def test_pyramid_score_matches_native_high_resolution(self):
+        """Proxy scoring keeps the overall score on sharp, blurred and noisy scans"""
+        full = DocumentQualityAssessor()
+        fast = DocumentQualityAssessor(fast_path=True)
+        for size, blur, noise in [((1700, 2200), 0, 0), ((1700, 2200), 8, 8),
+                                  ((2480, 3508), 3, 0), ((4032, 3024), 0, 0),
+                                  ((4032, 3024), 15, 8)]:
+            page = make_text_page(*size, blur=blur, noise=noise)
+            metrics, pyramid = fast.assess_metrics_pyramid(page)
+            reference = full.assess_metrics(page)
+            self.assertLess(pyramid['scale'], 1.0)
+            self.assertEqual(metrics['blur'], reference['blur'], (size, blur, noise))
+            self.assertEqual(fast.get_quality_score(metrics), full.get_quality_score(reference),
+                             (size, blur, noise))
+
+    def test_near_severity_boundary(self):
+        """Values within the relative margin of a boundary escalate"""
+        assessor = DocumentQualityAssessor(fast_path=True, escalation_margin=0.1)
+        self.assertTrue(assessor.is_near_severity_boundary('contrast', 72))
+        self.assertFalse(assessor.is_near_severity_boundary('contrast', 95))
+        self.assertTrue(assessor.is_near_severity_boundary('brightness', 210))
+        self.assertFalse(assessor.is_near_severity_boundary('brightness', 120))
+
+
+class TestBlurFFTEstimators(unittest.TestCase):
+    """Parity harness: real-FFT estimators track the shifted complex FFT"""
+
+    def setUp(self):
+        self.assessor = DocumentQualityAssessor()
+
+    @staticmethod
+    def shifted_quadrant_energy(image: np.ndarray) -> float:
+        """Reference metric: mean of the fftshift-ed magnitude from (h//4, w//4)"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        magnitude = np.abs(np.fft.fftshift(np.fft.fft2(gray)))
+        return magnitude[gray.shape[0] // 4:, gray.shape[1] // 4:].mean()
+
+    def test_full_fft_matches_complex_spectrum(self):
+        """Exact on odd and even sizes, and on high-resolution wide-margin pages"""
+        images = [make_document_image(width, height) for width, height in [(9, 7), (64, 101), (600, 895)]]
+        images += [cv2.imread(TEST_DOCUMENTS[0]), make_text_page(2480, 3508, blur=3)]
+        for image in images:
+            self.assertAlmostEqual(
+                self.assessor.assess_blur_fft(image) / self.shifted_quadrant_energy(image), 1.0,
+                places=9, msg=image.shape
+            )
+
+    def test_tiles_estimator_tracks_full_fft(self):
+        for path in TEST_DOCUMENTS:
+            image = cv2.imread(path)
+            reference = self.assessor.assess_blur(image, fft_method='full')
+            result = self.assessor.assess_blur(image, fft_method='tiles')
+            self.assertAlmostEqual(result['methods']['fft'], reference['methods']['fft'], delta=5, msg=path)
+            self.assertAlmostEqual(result['blur'], reference['blur'], delta=2, msg=path)
+            self.assertEqual(result['severity'], reference['severity'], path)
+
+    def test_window_handles_small_images(self):
+        """Windows shrink to the largest power of two that fits"""
+        image = make_document_image(width=200, height=90)
+        self.assertGreater(self.assessor.assess_blur_fft_window(image), 0)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            self.assessor.assess_blur(make_document_image(), fft_method='wavelet')
+        with self.assertRaises(ValueError):
+            DocumentQualityAssessor(fft_method='wavelet')
+        with self.assertRaises(ValueError):
+            DocumentQualityAssessor(fft_method='window')
+
+
+class TestRotationEstimators(unittest.TestCase):
+
+    def setUp(self):
+        self.assessor = DocumentQualityAssessor()
+        self.page = cv2.imread(os.path.join(TEST_DOCUMENTS_DIR, 'proof-of-address', 'PROOF-OF-ADDRESS.jpg'))
+
+    def rotate(self, image: np.ndarray, angle: float) -> np.ndarray:
+        h, w = image.shape[:2]
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        return cv2.warpAffine(image, matrix, (w, h), borderMode=cv2.BORDER_REPLICATE)
+
+    def test_recovers_known_skew(self):
+        """Robust engines recover the signed skew of a rotated page"""
+        for angle in (-12, -2, 3.5, 8):
+            rotated = self.rotate(self.page, angle)
+            result = self.assessor.assess_rotation(rotated, method='probabilistic')
+            self.assertAlmostEqual(result['angle'], angle, delta=0.5, msg=angle)
+
+    def test_probabilistic_resolves_the_green_boundary(self):
+        """Skews just either side of 1 degree land on the right side of it"""
+        for angle in (-1.3, -0.8, 0.7, 1.2):
+            rotated = self.rotate(self.page, angle)
+            result = self.assessor.assess_rotation(rotated, method='probabilistic')
+            self.assertAlmostEqual(result['angle'], angle, delta=0.2, msg=angle)
+            self.assertEqual(result['severity'], 'GREEN' if abs(angle) < 1 else 'YELLOW', angle)
+
+    def test_probabilistic_falls_back_on_text_only_cards(self):
+        """Cards whose text has no long straight strokes are measured from projection profiles"""
+        card = np.full((600, 950, 3), 240, dtype=np.uint8)
+        for y in range(60, 560, 40):
+            cv2.putText(card, 'NAME SMITH JOHN DOB 1980 LICENCE', (60, y), cv2.FONT_HERSHEY_PLAIN,
+                        2, (20, 20, 20), 2, cv2.LINE_AA)
+        for angle in (3, 7, 12):
+            rotated = self.rotate(card, angle)
+            angle_estimate, line_count = self.assessor.estimate_skew(rotated, method='probabilistic')
+            self.assertGreater(line_count, 0)
+            self.assertAlmostEqual(angle_estimate, angle, delta=0.3, msg=angle)
+
+    def test_projection_recovers_known_skew(self):
+        """Projection profiles recover skew on text pages to the fine step"""
+        for angle in (-12, -2, 0, 3.5, 8):
+            rotated = self.rotate(self.page, angle)
+            result = self.assessor.assess_rotation(rotated, method='projection')
+            self.assertAlmostEqual(result['angle'], angle, delta=0.2, msg=angle)
+
+    def test_straight_page_is_green(self):
+        """Every straight sample, the textured ID card included, scores GREEN"""
+        for path in TEST_DOCUMENTS:
+            image = cv2.imread(path)
+            for method in ('probabilistic', 'projection'):
+                result = self.assessor.assess_rotation(image, method=method)
+                self.assertEqual(result['severity'], 'GREEN', (method, path))
+
+    def test_projection_ignores_sparse_text(self):
+        """The ID sample's 5 text lines give no estimate rather than a false 1 degree"""
+        image = cv2.imread(os.path.join(TEST_DOCUMENTS_DIR, 'identity', 'PROOF-OF-IDENTIFICATION.jpg'))
+        self.assertEqual(self.assessor.estimate_skew(image, method='projection'), (0.0, 0))
+
+    def test_line_count_is_capped(self):
+        """Dense pages never feed more than MAX_HOUGH_LINES into the estimate"""
+        _, line_count = self.assessor.estimate_skew(self.page, method='probabilistic')
+        self.assertLessEqual(line_count, DocumentQualityAssessor.MAX_HOUGH_LINES)
+
+    def test_standard_hough_engine_removed(self):
+        with self.assertRaises(ValueError):
+            DocumentQualityAssessor(rotation_method='hough')
+
+    def test_blank_image(self):
+        blank = np.full((300, 400, 3), 200, dtype=np.uint8)
+        for method in ('probabilistic', 'projection'):
+            result = self.assessor.assess_rotation(blank, method=method)
+            self.assertEqual(result['rotation'], 0)
+            self.assertEqual(result['severity'], 'GREEN')
+
+    def test_enhancer_deskews(self):
+        """correct_rotation estimates and undoes the skew when no angle is given"""
+        enhancer = DocumentEnhancer()
+        rotated = self.rotate(self.page, 4)
+        straightened = enhancer.correct_rotation(rotated)
+        self.assertAlmostEqual(self.assessor.estimate_skew(straightened, method='projection')[0], 0, delta=0.2)
+        self.assertIs(enhancer.correct_rotation(self.page), self.page)
+
+        skew = self.assessor.assess_rotation(rotated)['angle']
+        enhanced, _ = enhancer.enhance_image(rotated, skew=skew)
+        self.assertEqual(enhanced.shape, rotated.shape)
+
+
+class TestAssessBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.assessor = DocumentQualityAssessor()
+
+    def test_paths_are_keyed_by_path(self):
+        results = dict(self.assessor.assess_batch(TEST_DOCUMENTS, workers=2))
+        self.assertEqual(set(results), set(TEST_DOCUMENTS))
+        for path, result in results.items():
+            self.assertEqual(result['score'], self.assessor.assess_document_quality(path)['score'], path)
+
+    def test_mixed_sources(self):
+        """Buffers and arrays are accepted alongside paths"""
+        with open(TEST_DOCUMENTS[0], 'rb') as f:
+            encoded = f.read()
+        sources = {
+            'path': TEST_DOCUMENTS[0],
+            'bytes': encoded,
+            'array': cv2.imread(TEST_DOCUMENTS[0])
+        }
+        results = dict(self.assessor.assess_batch(sources, workers=2))
+        self.assertEqual(set(results), set(sources))
+        self.assertEqual(len({result['score'] for result in results.values()}), 1)
+
+    def test_in_process_and_failures(self):
+        """workers=1 runs inline; bad inputs come back as failed results"""
+        results = list(self.assessor.assess_batch([b'not an image'], workers=1))
+        self.assertEqual(results[0][0], 0)
+        self.assertFalse(results[0][1]['success'])
+
+
+class TestInMemoryDecode(unittest.TestCase):
+
+    def setUp(self):
+        self.assessor = DocumentQualityAssessor()
+        with open(TEST_DOCUMENTS[0], 'rb') as f:
+            self.encoded = f.read()
+
+    def test_full_decode_matches_path(self):
+        from_bytes = self.assessor.assess_image_bytes(self.encoded)
+        from_path = self.assessor.assess_document_quality(TEST_DOCUMENTS[0])
+        self.assertEqual(from_bytes['metrics'], from_path['metrics'])
+        self.assertNotIn('decode_reduction', from_bytes)
+
+    def test_reduced_decode(self):
+        """Reduced decodes are grayscale and keep the source DPI estimate"""
+        full = decode_image(self.encoded)
+        for reduction in (2, 4, 8):
+            reduced = decode_image(self.encoded, reduction=reduction, grayscale=True)
+            self.assertEqual(reduced.ndim, 2)
+            self.assertEqual(reduced.shape[1], -(-full.shape[1] // reduction))
+            
+            result = self.assessor.assess_image_bytes(self.encoded, reduction=reduction)
+            self.assertTrue(result['success'])
+            self.assertEqual(result['decode_reduction'], reduction)
+            self.assertAlmostEqual(
+                result['metrics']['dpi']['dpi'],
+                self.assessor.assess_dpi(full)['dpi'],
+                delta=reduction
+            )
+
+    def test_reduced_decode_brackets_full_score(self):
+        """Blur is not measured on reduced decodes; the score bounds the full one"""
+        for blur in (0, 8):
+            encoded = cv2.imencode('.jpg', make_text_page(2480, 3508, blur=blur))[1].tobytes()
+            full = self.assessor.assess_image_bytes(encoded)
+            for reduction in (2, 4, 8):
+                result = self.assessor.assess_image_bytes(encoded, reduction=reduction)
+                self.assertIsNone(result['metrics']['blur']['severity'])
+                self.assertEqual(result['metrics']['blur']['status'], 'unavailable')
+                self.assertLessEqual(result['score'], full['score'], (blur, reduction))
+                self.assertGreaterEqual(self.assessor.score_upper_bound(result['metrics']), full['score'],
+                                        (blur, reduction))
+
+    def test_invalid_buffers(self):
+        self.assertFalse(self.assessor.assess_image_bytes(b'')['success'])
+        self.assertFalse(self.assessor.assess_image_bytes(b'not an image')['success'])
+        self.assertFalse(self.assessor.assess_image_bytes(self.encoded, reduction=3)['success'])
+
+    def test_enhance_document_bytes(self):
+        enhanced, original = DocumentEnhancer().enhance_document_bytes(self.encoded)
+        self.assertEqual(enhanced.shape, original.shape)
+        self.assertEqual(DocumentEnhancer().enhance_document_bytes(b'not an image'), (None, None))
+
+    def test_preflight_matches_full_assessment(self):
+        """Phone captures, sharp or blurred, get the full-decode verdict"""
+        assessor = DocumentQualityAssessor(crop_to_document=True, derivative_precision='float32')
+        for blur in (0, 5, 15):
+            encoded = cv2.imencode('.jpg', make_text_page(4032, 3024, blur=blur))[1].tobytes()
+            result = assessor.assess_preflight(encoded, min_score=50)
+            full = assessor.assess_image_bytes(encoded, min_score=50)
+            self.assertNotIn('decode_reduction', result)
+            self.assertEqual(result['metrics'], full['metrics'], blur)
+            self.assertEqual((result['score'], result['gate']['passed']),
+                             (full['score'], full['gate']['passed']), blur)
+            self.assertEqual(result['score'], self.assessor.assess_image_bytes(encoded)['score'], blur)
+
+    def test_preflight_reduces_decompression_bombs(self):
+        """Uploads over PIL's pixel limit are scored from the largest reduced decode"""
+        encoded = cv2.imencode('.jpg', make_document_image(1600, 1200))[1].tobytes()
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100_000):
+            result = self.assessor.assess_preflight(encoded)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['decode_reduction'], 8)
+        self.assertNotIn('decode_reduction', self.assessor.assess_preflight(encoded))
+
+    def test_preflight_thumbnail_keeps_source_dpi(self):
+        thumbnail = cv2.imencode('.jpg', make_document_image(480, 320))[1].tobytes()
+        result = self.assessor.assess_preflight(thumbnail, source_width=4800, min_score=50)
+        self.assertEqual(result['metrics']['dpi']['dpi'], int(4800 * 25.4 / 215))
+        self.assertIn('passed', result['gate'])
+        self.assertFalse(self.assessor.assess_preflight(b'not an image', source_width=4800)['success'])
+
+
+class TestQualityGate(unittest.TestCase):
+
+    def setUp(self):
+        self.assessor = DocumentQualityAssessor()
+
+    def test_gate_skips_expensive_metrics(self):
+        """Documents that cannot reach min_score skip blur and rotation"""
+        for path in TEST_DOCUMENTS:
+            full = self.assessor.assess_document_quality(path)
+            gated = self.assessor.assess_document_quality(path, min_score=100)
+            self.assertFalse(gated['gate']['passed'])
+            self.assertIn('blur', gated['gate']['skipped'])
+            self.assertIn('rotation', gated['gate']['skipped'])
+            for metric_name in gated['gate']['skipped']:
+                self.assertTrue(gated['metrics'][metric_name]['skipped'])
+                self.assertEqual(gated['metrics'][metric_name]['status'], 'skipped')
+            # Skipped metrics score RED; the best case is reported separately
+            self.assertLessEqual(gated['score'], full['score'])
+            self.assertGreaterEqual(gated['gate']['score_upper_bound'], full['score'])
+            self.assertEqual(gated['level'], 'REJECTED')
+
+    def test_gate_passes_reachable_documents(self):
+        for path in TEST_DOCUMENTS:
+            full = self.assessor.assess_document_quality(path)
+            gated = self.assessor.assess_document_quality(path, min_score=full['score'])
+            self.assertTrue(gated['gate']['passed'])
+            self.assertEqual(gated['gate']['skipped'], [])
+            self.assertEqual(gated['metrics'], full['metrics'])
+            self.assertEqual(gated['gate']['score_upper_bound'], full['score'])
+            self.assertEqual((gated['score'], gated['level']), (full['score'], full['level']))
+
+    def test_rejected_score_is_not_inflated(self):
+        """A gated-out document never reports more than its full score"""
+        assessor = DocumentQualityAssessor(crop_to_document=True)
+        for path in TEST_DOCUMENTS:
+            full = assessor.assess_document_quality(path)
+            gated = assessor.assess_document_quality(path, min_score=full['score'] + 1)
+            self.assertFalse(gated['gate']['passed'])
+            self.assertLessEqual(gated['score'], full['score'])
+            self.assertEqual(gated['level'], 'REJECTED')
+
+
+class TestTiledAssessment(unittest.TestCase):
+
+    def setUp(self):
+        self.assessor = DocumentQualityAssessor()
+        # Small bands so every sample spans many strips
+        self.assessor.TILE_STRIP_ROWS = 64
+
+    def test_streamed_statistics_match_whole_image(self):
+        for path in TEST_DOCUMENTS:
+            image = cv2.imread(path)
+            context = ImageAnalysisContext(image)
+            statistics = self.assessor.tiled_statistics(image)
+            self.assertAlmostEqual(statistics['mean'], np.mean(context.gray), places=6)
+            self.assertAlmostEqual(statistics['std'], np.std(context.gray), places=6)
+            self.assertAlmostEqual(
+                statistics['laplacian_var'] / context.laplacian.var(), 1.0, places=9
+            )
+            self.assertAlmostEqual(
+                statistics['gradient_mean'] / context.gradient_magnitude.mean(), 1.0, places=9
+            )
+
+    def test_tiled_metrics_track_full_metrics(self):
+        for path in TEST_DOCUMENTS:
+            image = cv2.imread(path)
+            full = self.assessor.assess_metrics(image)
+            tiled = self.assessor.assess_metrics_tiled(image)
+            for metric_name in ('dpi', 'contrast', 'brightness'):
+                self.assertEqual(tiled[metric_name]['severity'], full[metric_name]['severity'], path)
+            self.assertEqual(tiled['blur']['methods']['laplacian'], full['blur']['methods']['laplacian'])
+            self.assertEqual(tiled['blur']['methods']['gradient'], full['blur']['methods']['gradient'])
+            self.assertAlmostEqual(tiled['blur']['blur'], full['blur']['blur'], delta=3)
+
+    def test_large_images_use_tiled_path(self):
+        assessor = DocumentQualityAssessor(tiled_pixel_threshold=100_000)
+        result = assessor.assess_document_quality(TEST_DOCUMENTS[0])
+        self.assertTrue(result['tiled'])
+        self.assertNotIn('tiled', DocumentQualityAssessor().assess_document_quality(TEST_DOCUMENTS[0]))
+
+    def test_rotation_follows_configured_engine(self):
+        """Tiled rotation runs the configured engine; only legacy is substituted"""
+        page = cv2.imread(os.path.join(TEST_DOCUMENTS_DIR, 'proof-of-address', 'PROOF-OF-ADDRESS.jpg'))
+        h, w = page.shape[:2]
+        rotated = cv2.warpAffine(page, cv2.getRotationMatrix2D((w / 2, h / 2), 3, 1.0), (w, h),
+                                 borderMode=cv2.BORDER_REPLICATE)
+        for method, expected in [('probabilistic', 'probabilistic'), ('projection', 'projection'),
+                                 ('legacy', 'probabilistic')]:
+            assessor = DocumentQualityAssessor(rotation_method=method, tiled_pixel_threshold=100_000)
+            with mock.patch.object(assessor, 'estimate_skew', wraps=assessor.estimate_skew) as estimate:
+                result = assessor.assess_image(rotated)
+            self.assertTrue(result['tiled'])
+            self.assertEqual(estimate.call_args.kwargs['method'], expected, method)
+            self.assertAlmostEqual(result['metrics']['rotation']['angle'], 3, delta=0.3, msg=method)
+
+    def test_pyramid_escalates_to_tiles_on_large_images(self):
+        """fast_path never builds full-resolution planes above the threshold"""
+        image = cv2.resize(cv2.imread(TEST_DOCUMENTS[0]), (4000, 3000))
+        assessor = DocumentQualityAssessor(fast_path=True, tiled_pixel_threshold=1_000_000,
+                                           escalation_margin=10.0)
+        scales = []
+        metric_assessors = assessor._metric_assessors
+
+        def recording(image, scale=1.0):
+            scales.append(scale)
+            return metric_assessors(image, scale)
+
+        assessor._metric_assessors = recording
+        result = assessor.assess_image(image)
+        self.assertTrue(result['success'])
+        self.assertTrue(result['tiled'])
+        self.assertTrue(result['pyramid']['escalated'])
+        self.assertTrue(all(scale < 1 for scale in scales), scales)
+
+
+class TestDocumentPages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.frames = [Image.open(path).convert('RGB') for path in TEST_DOCUMENTS]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, filename: str, frames: list) -> str:
+        path = os.path.join(self.tmpdir.name, filename)
+        frames[0].save(path, save_all=True, append_images=frames[1:])
+        return path
+
+    def test_multi_page_tiff(self):
+        path = self.write('statement.tiff', self.frames)
+        self.assertEqual(document_page_count(path), len(self.frames))
+        
+        pages = iter_document_pages(path)
+        page_index, first = next(pages)
+        self.assertEqual(page_index, 0)
+        self.assertEqual(first.shape, np.asarray(self.frames[0]).shape)
+        self.assertEqual([index for index, _ in pages], list(range(1, len(self.frames))))
+
+    def test_bilevel_tiff_is_bgr(self):
+        path = self.write('fax.tif', [self.frames[0].convert('1')])
+        (_, page), = iter_document_pages(path)
+        self.assertEqual(page.ndim, 3)
+
+    def test_16_bit_tiff_matches_imread(self):
+        """High-bit-depth scans are scaled to 8-bit, not clipped"""
+        gradient = np.tile(np.linspace(0, 65535, 256).astype(np.uint16), (64, 1))
+        path = os.path.join(self.tmpdir.name, 'scan16.tif')
+        cv2.imwritemulti(path, [gradient, np.full((32, 32, 3), 40000, np.uint16)])
+        pages = [page for _, page in iter_document_pages(path)]
+        np.testing.assert_array_equal(pages[0], cv2.imread(path))
+        self.assertAlmostEqual(pages[0].mean(), 127.5, delta=1)
+        self.assertEqual(pages[1].shape, (32, 32, 3))
+        self.assertEqual(pages[1].dtype, np.uint8)
+        self.assertEqual(int(pages[1].mean()), 40000 >> 8)
+
+    def test_single_frame_image(self):
+        self.assertEqual(document_page_count(TEST_DOCUMENTS[0]), 1)
+        self.assertEqual(len(list(iter_document_pages(TEST_DOCUMENTS[0]))), 1)
+
+    def test_pipeline_consumes_pages(self):
+        path = self.write('statement.tiff', self.frames)
+        results = list(DocumentQualityAssessor().assess_document_pages(path))
+        self.assertEqual([result['page'] for result in results], list(range(len(self.frames))))
+        self.assertTrue(all(result['success'] for result in results))
+        
+        enhanced = list(DocumentEnhancer().enhance_document_pages(path))
+        self.assertEqual(len(enhanced), len(self.frames))
+        
+        extractions = list(OCRExtractor().extract_pages(iter_document_pages(path)))
+        self.assertEqual([result['page'] for result in extractions], list(range(len(self.frames))))
+
+    @unittest.skipUnless(importlib.util.find_spec('fitz'), 'PyMuPDF not installed')
+    def test_pdf_pages(self):
+        path = self.write('statement.pdf', self.frames)
+        self.assertEqual(document_page_count(path), len(self.frames))
+        self.assertEqual(len(list(iter_document_pages(path))), len(self.frames))
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_timings_cover_load_and_metrics(self):
+        """Instrumented assessments report every stage that ran"""
+        assessor = DocumentQualityAssessor(instrument=True)
+        result = assessor.assess_document_quality(TEST_DOCUMENTS[0])
+        self.assertEqual(
+            set(result['timings']),
+            {'load', 'dpi', 'contrast', 'rotation', 'blur', 'brightness'}
+        )
+        for timing in result['timings'].values():
+            self.assertGreaterEqual(timing['seconds'], 0)
+            self.assertGreaterEqual(timing['peak_bytes'], 0)
+        self.assertGreater(result['timings']['blur']['peak_bytes'], 0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_skipped_metrics_are_not_timed(self):
+        assessor = DocumentQualityAssessor(instrument=True)
+        with open(TEST_DOCUMENTS[0], 'rb') as f:
+            result = assessor.assess_image_bytes(f.read(), min_score=95)
+        self.assertEqual(set(result['timings']), {'load', 'dpi', 'brightness'})
+
+    def test_disabled_by_default(self):
+        result = DocumentQualityAssessor().assess_image(make_document_image())
+        self.assertNotIn('timings', result)
+
+    def test_overlapping_profilers_share_tracing(self):
+        """A profiler exiting first does not stop tracing under another's stage"""
+        first, second = MetricProfiler(MetricHistogramRegistry()), MetricProfiler(MetricHistogramRegistry())
+        first.__enter__()
+        with second.measure('blur'):
+            first.__exit__(None, None, None)
+            self.assertTrue(tracemalloc.is_tracing())
+            buffer = np.ones(1_000_000)
+        del buffer
+        self.assertGreaterEqual(second.timings['blur']['peak_bytes'], 8_000_000)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_registry_histograms(self):
+        """Profiled stages feed the shared registry"""
+        registry = MetricHistogramRegistry()
+        profiler = MetricProfiler(registry)
+        for _ in range(3):
+            with profiler.measure('load'):
+                np.zeros((256, 256))
+        histograms = registry.snapshot()['load']
+        self.assertEqual(histograms['seconds']['count'], 3)
+        self.assertEqual(sum(histograms['peak_bytes']['counts']), 3)
+        self.assertEqual(
+            len(histograms['seconds']['counts']), len(histograms['seconds']['bounds']) + 1
+        )
+        registry.reset()
+        self.assertEqual(registry.snapshot(), {})
+
+
+class TestDocumentLocalization(unittest.TestCase):
+
+    def test_locates_card_on_tabletop(self):
+        region = locate_document(make_tabletop_capture())
+        self.assertIsNotNone(region)
+        np.testing.assert_allclose(region['quad'], TABLETOP_CARD_QUAD, atol=8)
+        self.assertLess(region['coverage'], 0.2)
+
+    def test_flat_scans_have_no_region(self):
+        """Sample documents fill the frame, so nothing is cropped"""
+        for path in TEST_DOCUMENTS:
+            self.assertIsNone(locate_document(cv2.imread(path)), path)
+
+    def test_reduced_decode_reports_source_coordinates(self):
+        image = make_tabletop_capture()
+        half = cv2.resize(image, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+        region = locate_document(half, scale=0.5)
+        np.testing.assert_allclose(region['quad'], TABLETOP_CARD_QUAD, atol=10)
+
+    def test_cropped_metrics(self):
+        """Contrast, blur and rotation are measured inside the document only"""
+        image = make_tabletop_capture()
+        full = DocumentQualityAssessor().assess_image(image)
+        cropped = DocumentQualityAssessor(crop_to_document=True).assess_image(image)
+        self.assertIsNotNone(cropped['document_region'])
+        self.assertEqual(cropped['metrics']['dpi'], full['metrics']['dpi'])
+        self.assertEqual(cropped['metrics']['brightness'], full['metrics']['brightness'])
+        self.assertGreater(cropped['metrics']['contrast']['contrast'], full['metrics']['contrast']['contrast'])
+
+    def test_enhancer_reuses_region(self):
+        image = make_tabletop_capture()
+        region = DocumentQualityAssessor(crop_to_document=True).assess_image(image)['document_region']
+        corrected = DocumentEnhancer().correct_perspective(image, region)
+        h, w = corrected.shape[:2]
+        self.assertAlmostEqual(w / h, 640 / 400, delta=0.1)
+        # The warped card is the light document, not the tabletop
+        self.assertGreater(np.mean(corrected), 150)
+
+    def test_enhancer_detects_outline_itself(self):
+        """Without a region the quad is found on a thumbnail and scaled back up"""
+        image = cv2.resize(make_tabletop_capture(), (3200, 2400))
+        corrected = DocumentEnhancer().correct_perspective(image)
+        h, w = corrected.shape[:2]
+        # Longest card edge is ~622px in the 1600x1200 capture
+        self.assertAlmostEqual(w, 2 * 622, delta=30)
+        self.assertAlmostEqual(w / h, 640 / 400, delta=0.1)
+        self.assertGreater(np.mean(corrected), 150)
+
+    def test_enhancer_leaves_flat_scans(self):
+        for path in TEST_DOCUMENTS:
+            image = cv2.imread(path)
+            self.assertIs(DocumentEnhancer().correct_perspective(image), image, path)
+
+
+class TestGeometryStage(unittest.TestCase):
+
+    def setUp(self):
+        self.enhancer = DocumentEnhancer()
+        self.assessor = DocumentQualityAssessor()
+
+    def test_rotation_only_matches_correct_rotation(self):
+        page = make_document_image(900, 700)
+        rotated = cv2.warpAffine(page, cv2.getRotationMatrix2D((450, 350), 3, 1.0), (900, 700),
+                                 borderValue=(235, 235, 235))
+        corrected, corrections = self.enhancer.correct_geometry(rotated, skew=3)
+        self.assertEqual(corrections, ['rotation'])
+        np.testing.assert_array_equal(corrected, self.enhancer.correct_rotation(rotated, -3))
+
+    def test_residual_skew_folded_into_warp(self):
+        """Printing skewed on the card is straightened by the same warp"""
+        image = make_tabletop_capture(text_skew=2)
+        M, size, corrections = self.enhancer.geometry_transform(image)
+        self.assertEqual(corrections, ['rotation', 'perspective'])
+        corrected, _ = self.enhancer.correct_geometry(image)
+        np.testing.assert_array_equal(corrected, cv2.warpPerspective(image, M, size))
+        self.assertAlmostEqual(self.assessor.estimate_skew(corrected, method='projection')[0], 0, delta=0.3)
+
+    def test_straight_samples_are_not_rotated(self):
+        """Sparse-text estimates (the ID card's 5 lines) do not tilt a straight scan"""
+        for path in TEST_DOCUMENTS:
+            image = cv2.imread(path)
+            corrected, corrections = self.enhancer.correct_geometry(image)
+            self.assertEqual(corrections, [], path)
+            self.assertIs(corrected, image, path)
+            self.assertIs(self.enhancer.correct_rotation(image), image, path)
+
+    def test_rotate_disabled(self):
+        image = make_tabletop_capture(text_skew=2)
+        _, corrections = self.enhancer.correct_geometry(image, rotate=False)
+        self.assertEqual(corrections, ['perspective'])
+        corrected, corrections = self.enhancer.correct_geometry(image, locate=False, rotate=False)
+        self.assertIs(corrected, image)
+        self.assertEqual(corrections, [])
+
+    def test_single_resample_is_sharper(self):
+        """One composed warp keeps more detail than rotating then warping"""
+        image = make_tabletop_capture(text_skew=2)
+        M, size, _ = self.enhancer.geometry_transform(image)
+        composed = cv2.warpPerspective(image, M, size)
+        H, _ = document_warp(locate_document(image))
+        two_pass = cv2.warpPerspective(image, H, size)
+        rotation = M @ np.linalg.inv(H)
+        two_pass = cv2.warpAffine(two_pass, rotation[:2], size)
+        sharpness = lambda img: cv2.Laplacian(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var()
+        self.assertGreater(sharpness(composed), sharpness(two_pass))
+
+
+class TestBestFrameSelection(unittest.TestCase):
+
+    def setUp(self):
+        self.assessor = DocumentQualityAssessor()
+        sharp = make_document_image(1800, 1200)
+        self.frames = {
+            'sharp': sharp,
+            'soft': cv2.GaussianBlur(sharp, (11, 11), 0),
+            'blurred': cv2.GaussianBlur(sharp, (19, 19), 0),
+            'smeared': cv2.GaussianBlur(sharp, (31, 31), 0)
+        }
+
+    def test_stops_at_first_excellent_frame(self):
+        consumed = []
+
+        def burst():
+            for name in ('blurred', 'smeared', 'sharp', 'soft'):
+                consumed.append(name)
+                yield self.frames[name]
+
+        best = self.assessor.select_best_frame(burst())
+        self.assertTrue(best['success'])
+        self.assertEqual(best['frame'], 2)
+        self.assertEqual(best['score'], 100)
+        self.assertTrue(best['early_exit'])
+        self.assertEqual(consumed, ['blurred', 'smeared', 'sharp'])
+
+    def test_gates_frames_that_cannot_win(self):
+        """Frames that cannot beat the best so far skip the expensive metrics"""
+        frames = [self.frames[name] for name in ('blurred', 'soft', 'smeared')]
+        best = self.assessor.select_best_frame(frames, target_score=101)
+        self.assertEqual(best['frame'], 1)
+        self.assertEqual(best['score'], self.assessor.assess_image(frames[1])['score'])
+        self.assertEqual(best['frames_assessed'], 3)
+        self.assertEqual(best['frames_gated'], 1)
+        self.assertFalse(best['early_exit'])
+        self.assertNotIn('skipped', best['result']['metrics']['blur'])
+
+    def test_no_usable_frames(self):
+        self.assertFalse(self.assessor.select_best_frame([])['success'])
+        self.assertFalse(self.assessor.select_best_frame([b'not an image'])['success'])
+
+    def test_video_frames(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'burst.avi')
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (320, 240))
+            if not writer.isOpened():
+                self.skipTest('MJPG video writer unavailable')
+            for _ in range(5):
+                writer.write(make_document_image(320, 240))
+            writer.release()
+            self.assertEqual(len(list(iter_video_frames(path))), 5)
+            self.assertEqual(len(list(iter_video_frames(path, stride=2))), 3)
+            self.assertEqual(self.assessor.select_best_frame(iter_video_frames(path))['frame'], 0)
+
+
+class TestConcurrentMetrics(unittest.TestCase):
+
+    def test_matches_sequential_metrics(self):
+        sequential = DocumentQualityAssessor()
+        concurrent = DocumentQualityAssessor(metric_workers=4)
+        for path in TEST_DOCUMENTS:
+            expected = sequential.assess_document_quality(path)
+            result = concurrent.assess_document_quality(path)
+            self.assertEqual(result['metrics'], expected['metrics'], path)
+            self.assertEqual(list(result['metrics']), list(expected['metrics']))
+
+    def test_gated_and_tiled_paths(self):
+        image = make_document_image(1800, 1200)
+        sequential = DocumentQualityAssessor(tiled_pixel_threshold=1_000_000)
+        concurrent = DocumentQualityAssessor(tiled_pixel_threshold=1_000_000, metric_workers=3)
+        for min_score in (None, 50, 95):
+            expected = sequential.assess_image(image, min_score=min_score)
+            result = concurrent.assess_image(image, min_score=min_score)
+            self.assertEqual(result['metrics'], expected['metrics'])
+            self.assertEqual(result.get('gate'), expected.get('gate'))
+
+    def test_shared_planes_are_computed_once(self):
+        """Concurrent first access to a plane runs its computation once"""
+        context = ImageAnalysisContext(make_document_image())
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return context.gray.copy()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            planes = list(pool.map(lambda _: context._plane('plane', compute), range(8)))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(plane is planes[0] for plane in planes))
+
+    def test_opencv_threads_are_shared_at_construction(self):
+        """Assessors cap OpenCV threads when built, never raise them, and running leaves them alone"""
+        threads = cv2.getNumThreads()
+        self.addCleanup(cv2.setNumThreads, threads)
+        cv2.setNumThreads(8)
+        with mock.patch('os.cpu_count', return_value=8):
+            assessor = DocumentQualityAssessor(metric_workers=4)
+            self.assertEqual(cv2.getNumThreads(), 2)
+            DocumentQualityAssessor(metric_workers=2)
+            DocumentQualityAssessor()
+            self.assertEqual(cv2.getNumThreads(), 2)
+            cv2.setNumThreads(3)
+            assessor.metric_workers = 6
+            assessor.assess_image(make_document_image())
+            self.assertEqual(cv2.getNumThreads(), 3)
+
+    def test_instrumented(self):
+        result = DocumentQualityAssessor(metric_workers=4, instrument=True).assess_image(make_document_image())
+        self.assertEqual(set(result['timings']), {'dpi', 'contrast', 'rotation', 'blur', 'brightness'})
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+class TestDerivativePrecision(unittest.TestCase):
+
+    def test_reduced_precision_tracks_float64(self):
+        """float32 / int16 derivatives keep raw blur responses within 1e-4 relative"""
+        reference = DocumentQualityAssessor()
+        for precision in ('float32', 'int16'):
+            assessor = DocumentQualityAssessor(derivative_precision=precision)
+            for path in TEST_DOCUMENTS:
+                context = ImageAnalysisContext(cv2.imread(path))
+                self.assertAlmostEqual(
+                    assessor.assess_blur_laplacian(context) / reference.assess_blur_laplacian(context),
+                    1.0, places=4, msg=(precision, path)
+                )
+                self.assertAlmostEqual(
+                    assessor.assess_blur_gradient(context) / reference.assess_blur_gradient(context),
+                    1.0, places=4, msg=(precision, path)
+                )
+                self.assertEqual(assessor.assess_blur(context), reference.assess_blur(context))
+
+    def test_tiled_statistics(self):
+        image = cv2.imread(TEST_DOCUMENTS[0])
+        reference = DocumentQualityAssessor().tiled_statistics(image)
+        statistics = DocumentQualityAssessor(derivative_precision='int16').tiled_statistics(image)
+        self.assertAlmostEqual(statistics['laplacian_var'] / reference['laplacian_var'], 1.0, places=6)
+        self.assertAlmostEqual(statistics['gradient_mean'] / reference['gradient_mean'], 1.0, places=4)
+
+    def test_unknown_precision(self):
+        with self.assertRaises(ValueError):
+            DocumentQualityAssessor(derivative_precision='float16')
+
+
+class TestAdaptiveEnhancement(unittest.TestCase):
+
+    def setUp(self):
+        self.assessor = DocumentQualityAssessor(crop_to_document=True)
+        self.enhancer = DocumentEnhancer()
+
+    def test_clean_page_is_untouched(self):
+        image = make_document_image(1800, 1200)
+        enhanced, original, plan = self.enhancer.enhance_adaptive(image, self.assessor.assess_image(image))
+        self.assertEqual(plan['applied'], [])
+        self.assertIs(enhanced, image)
+        self.assertEqual(set(plan['skipped']), set(DocumentEnhancer.ENHANCEMENT_STEPS))
+
+    def test_degraded_page_runs_matching_steps(self):
+        """A washed-out, soft page gets contrast and denoise passes"""
+        image = cv2.GaussianBlur(make_document_image(1800, 1200), (15, 15), 0)
+        image = cv2.convertScaleAbs(image, alpha=0.3, beta=120)
+        assessment = self.assessor.assess_image(image)
+        _, _, plan = self.enhancer.enhance_adaptive(image, assessment)
+        self.assertIn('clahe', plan['applied'])
+        self.assertIn('denoise', plan['applied'])
+        self.assertNotIn('perspective', plan['steps'])
+
+    def test_located_document_is_warped_not_rotated(self):
+        """The card's tilt is removed by the warp; its text has no skew left"""
+        image = make_tabletop_capture()
+        enhanced, _, plan = self.enhancer.enhance_adaptive(image, self.assessor.assess_image(image))
+        self.assertIn('perspective', plan['applied'])
+        self.assertNotIn('rotation', plan['applied'])
+        h, w = enhanced.shape[:2]
+        self.assertAlmostEqual(w / h, 640 / 400, delta=0.1)
+
+    def test_unknown_metrics_keep_steps(self):
+        """Missing or gate-skipped metrics do not rule a step out"""
+        plan = self.enhancer.plan_enhancement({'metrics': {'contrast': {'severity': None, 'skipped': True}}})
+        self.assertEqual(plan['steps'], list(DocumentEnhancer.ENHANCEMENT_STEPS))
+
+    def test_enhance_document_with_assessment(self):
+        path = TEST_DOCUMENTS[0]
+        assessment = self.assessor.assess_document_quality(path)
+        enhanced, original = self.enhancer.enhance_document(path, assessment['score'], assessment)
+        expected, _, _ = self.enhancer.enhance_adaptive(original, assessment)
+        np.testing.assert_array_equal(enhanced, expected)
+
+
+class TestLuminanceStage(unittest.TestCase):
+
+    def setUp(self):
+        self.enhancer = DocumentEnhancer()
+        self.image = cv2.imread(TEST_DOCUMENTS[0])
+
+    def test_single_operations_match_split_merge(self):
+        lab = cv2.cvtColor(self.image, cv2.COLOR_BGR2LAB)
+        l, a, b = cv2.split(lab)
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        expected = cv2.cvtColor(cv2.merge([clahe.apply(l), a, b]), cv2.COLOR_LAB2BGR)
+        np.testing.assert_array_equal(self.enhancer.apply_clahe(self.image), expected)
+        expected = cv2.cvtColor(cv2.merge([cv2.equalizeHist(l), a, b]), cv2.COLOR_LAB2BGR)
+        np.testing.assert_array_equal(self.enhancer.normalize_brightness(self.image), expected)
+
+    def test_fused_round_trip(self):
+        """Both L-channel operations are applied to one LAB conversion"""
+        lab = cv2.cvtColor(self.image, cv2.COLOR_BGR2LAB)
+        l = cv2.equalizeHist(cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(lab[..., 0].copy()))
+        lab[..., 0] = l
+        np.testing.assert_array_equal(self.enhancer.enhance_luminance(self.image),
+                                      cv2.cvtColor(lab, cv2.COLOR_LAB2BGR))
+        self.assertIs(self.enhancer.enhance_luminance(self.image, clahe=False, equalize=False), self.image)
+
+    def test_grayscale(self):
+        gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        np.testing.assert_array_equal(self.enhancer.enhance_luminance(gray, clahe=False),
+                                      cv2.equalizeHist(gray))
+
+    def test_clahe_cached_per_thread(self):
+        self.assertIs(thread_clahe(), thread_clahe())
+        self.assertIsNot(thread_clahe(), thread_clahe(3.0))
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            self.assertIsNot(pool.submit(thread_clahe).result(), thread_clahe())
+
+
+class TestDenoiseEngines(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.clean = cv2.resize(cv2.imread(TEST_DOCUMENTS[0]), (1240, 1754))
+        noise = rng.normal(0, 12, self.clean.shape)
+        self.noisy = np.clip(self.clean + noise, 0, 255).astype(np.uint8)
+
+    def test_engines_reduce_noise(self):
+        enhancer = DocumentEnhancer()
+        baseline = cv2.PSNR(self.noisy, self.clean)
+        for method in DocumentEnhancer.DENOISE_METHODS:
+            denoised = enhancer.remove_noise(self.noisy, method)
+            self.assertEqual(denoised.shape, self.noisy.shape, method)
+            self.assertEqual(denoised.dtype, np.uint8, method)
+            self.assertGreater(cv2.PSNR(denoised, self.clean), baseline + 2, method)
+            gray = cv2.cvtColor(self.noisy, cv2.COLOR_BGR2GRAY)
+            self.assertEqual(enhancer.remove_noise(gray, method).shape, gray.shape, method)
+
+    def test_default_engine_unchanged(self):
+        np.testing.assert_array_equal(DocumentEnhancer().remove_noise(self.noisy),
+                                      cv2.bilateralFilter(self.noisy, 9, 75, 75))
+
+    def test_benchmark(self):
+        """Fast engines beat full-resolution bilateral and stay close to its output"""
+        report = DocumentEnhancer().benchmark_denoise([self.noisy], repeat=2)
+        self.assertEqual(set(report), set(DocumentEnhancer.DENOISE_METHODS))
+        for method in ('small', 'downsampled'):
+            self.assertLess(report[method]['seconds'], report['bilateral']['seconds'], method)
+            self.assertGreater(report[method]['psnr'], 30, method)
+
+    @unittest.skipUnless(importlib.util.find_spec('pytesseract'), 'pytesseract not installed')
+    def test_ocr_parity(self):
+        """OCR of enhanced sample documents barely moves with a fast engine"""
+        extractor = OCRExtractor()
+
+        def words(image):
+            result = extractor.extract_text_with_confidence(image)
+            self.assertTrue(result['success'], result.get('error'))
+            return [extraction['text'] for extraction in result['extractions'] if extraction['text'].strip()]
+
+        for path in TEST_DOCUMENTS:
+            image = cv2.imread(path)
+            reference = words(DocumentEnhancer().enhance_image(image)[0])
+            for method in ('small', 'downsampled'):
+                candidate = words(DocumentEnhancer(denoise_method=method).enhance_image(image)[0])
+                shared = sum(min(reference.count(word), candidate.count(word)) for word in set(reference))
+                self.assertGreaterEqual(shared, 0.95 * len(reference), (method, path))
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            DocumentEnhancer(denoise_method='median')
+
+
+class TestDocumentPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.pipeline = DocumentPipeline(DocumentQualityAssessor(crop_to_document=True))
+
+    def test_clean_page_shares_decoded_buffer(self):
+        image = make_document_image(1800, 1200)
+        result = self.pipeline.process_image(image)
+        self.assertEqual(result['enhancement']['applied'], [])
+        self.assertTrue(np.shares_memory(result['enhanced_image'], image))
+        # The caller's array stays writable; only the pipeline's view is frozen
+        self.assertTrue(image.flags.writeable)
+        self.assertFalse(result['enhanced_image'].flags.writeable)
+
+    def test_matches_separate_stages(self):
+        path = TEST_DOCUMENTS[0]
+        result = next(self.pipeline.process_document(path))
+        image = cv2.imread(path)
+        assessment = DocumentQualityAssessor(crop_to_document=True).assess_image(image)
+        enhanced, _, plan = DocumentEnhancer().enhance_adaptive(image, assessment)
+        self.assertEqual(result['quality_assessment']['score'], assessment['score'])
+        self.assertEqual(result['enhancement'], plan)
+        np.testing.assert_array_equal(result['enhanced_image'], enhanced)
+        self.assertIn('extractions', result['extraction'])
+
+    def test_multi_page(self):
+        pages = [make_document_image(), make_tabletop_capture()]
+        results = list(self.pipeline.process_pages(enumerate(pages)))
+        self.assertEqual([result['page'] for result in results], [0, 1])
+        self.assertIn('perspective', results[1]['enhancement']['applied'])
+
+    def test_process_bytes(self):
+        with open(TEST_DOCUMENTS[0], 'rb') as f:
+            result = self.pipeline.process_bytes(f.read())
+        self.assertTrue(result['success'])
+        self.assertIn('score', result['quality_assessment'])
+        failed = self.pipeline.process_bytes(b'not an image')
+        self.assertFalse(failed['success'])
+        self.assertIn('error', failed)
+        self.assertEqual(set(failed) - {'error'}, set(result))
+        self.assertIsNone(failed['enhanced_image'])
+
+    def test_enhance_image_leaves_input_untouched(self):
+        image = make_tabletop_capture()
+        before = image.copy()
+        enhanced, original = DocumentEnhancer().enhance_image(image)
+        self.assertIs(original, image)
+        self.assertFalse(np.shares_memory(enhanced, image))
+        np.testing.assert_array_equal(image, before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Route tests for the /assessQuality preflight endpoint"""
+
+import unittest
+import sys
+import os
+import base64
+
+import cv2
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from flask_app import app, get_quality_assessor
+
+
+def encode_page(width: int = 1200, height: int = 900) -> bytes:
+    """JPEG of a light page with dark text-like bars"""
+    image = np.full((height, width, 3), 235, dtype=np.uint8)
+    for y in range(60, height - 60, 30):
+        cv2.rectangle(image, (60, y), (width - 60, y + 10), (20, 20, 20), -1)
+    return cv2.imencode('.jpg', image)[1].tobytes()
+
+
+class TestAssessQualityRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.client = app.test_client()
+        self.encoded = encode_page()
+        self.image = base64.b64encode(self.encoded).decode('ascii')
+
+    def assert_bad_request(self, response):
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.get_json())
+
+    def test_scores_upload(self):
+        """The response carries the full-decode verdict"""
+        response = self.client.post('/assessQuality', json={'image': 'data:image/jpeg;base64,' + self.image})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        expected = get_quality_assessor().assess_image_bytes(self.encoded, min_score=50)
+        self.assertEqual(body['score'], expected['score'])
+        self.assertEqual(body['level'], expected['level'])
+        self.assertEqual(body['acceptable'], expected['gate']['passed'])
+        self.assertEqual(set(body['metrics']), set(expected['metrics']))
+
+    def test_thumbnail_reports_blur_unavailable(self):
+        response = self.client.post('/assessQuality', json={'image': self.image, 'sourceWidth': 4800})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.get_json()['metrics']['blur']['severity'])
+
+    def test_rejects_malformed_bodies(self):
+        """Bodies that are not JSON objects are client errors, not server errors"""
+        self.assert_bad_request(self.client.post('/assessQuality', data='not json',
+                                                 content_type='application/json'))
+        self.assert_bad_request(self.client.post('/assessQuality', json=[self.image]))
+        self.assert_bad_request(self.client.post('/assessQuality', json={}))
+        self.assert_bad_request(self.client.post('/assessQuality', json={'image': 42}))
+        self.assert_bad_request(self.client.post('/assessQuality', json={'image': [self.image]}))
+        self.assert_bad_request(self.client.post('/assessQuality', json={'image': '   '}))
+
+    def test_rejects_invalid_options(self):
+        self.assert_bad_request(self.client.post('/assessQuality', json={'image': self.image, 'sourceWidth': -1}))
+        self.assert_bad_request(self.client.post('/assessQuality', json={'image': self.image, 'minScore': 101}))
+        self.assert_bad_request(self.client.post('/assessQuality', json={'image': self.image, 'minScore': '50'}))
+
+    def test_rejects_unreadable_images(self):
+        self.assert_bad_request(self.client.post('/assessQuality', json={'image': 'not base64!'}))
+        garbage = base64.b64encode(b'not an image').decode('ascii')
+        self.assert_bad_request(self.client.post('/assessQuality', json={'image': garbage}))
+
+    def test_options_preflight(self):
+        self.assertEqual(self.client.open('/assessQuality', method='OPTIONS').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the content-hash quality result cache"""
+
+import unittest
+import sys
+import os
+import pickle
+import tempfile
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from src.modules.document_processor import DocumentQualityAssessor
+from src.modules.quality_cache import QualityResultCache
+
+TEST_DOCUMENTS_DIR = os.path.join(os.path.dirname(__file__), 'test-documents')
+TEST_DOCUMENT = os.path.join(TEST_DOCUMENTS_DIR, 'business', 'ABN-VERIFICATION.jpg')
+
+
+class TestQualityResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'cache', 'quality.sqlite3')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_through_disk(self):
+        """Entries survive a fresh cache instance on the same store"""
+        cache = QualityResultCache(self.db_path)
+        key = cache.make_key(b'image', 'v1')
+        cache.put(key, {'score': 80.5})
+        self.assertEqual(QualityResultCache(self.db_path).get(key), {'score': 80.5})
+        self.assertIsNone(cache.get(cache.make_key(b'image', 'v2')))
+
+    def test_memory_lru_is_bounded(self):
+        """The in-process LRU drops its oldest entries"""
+        cache = QualityResultCache(self.db_path, memory_entries=2)
+        for name in ('a', 'b', 'c'):
+            cache.put(name, {'name': name})
+        self.assertEqual(list(cache._memory), ['b', 'c'])
+        self.assertEqual(cache.get('a'), {'name': 'a'})
+
+    def test_disk_eviction_by_size(self):
+        """Least recently accessed rows are evicted past max_disk_bytes"""
+        cache = QualityResultCache(self.db_path, memory_entries=0, max_disk_bytes=100)
+        for name in ('a', 'b', 'c'):
+            cache.put(name, {'payload': name * 30})
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_pickles_for_worker_processes(self):
+        cache = QualityResultCache(self.db_path)
+        cache.put('key', {'score': 1})
+        clone = pickle.loads(pickle.dumps(cache))
+        self.assertFalse(clone._memory)
+        self.assertEqual(clone.get('key'), {'score': 1})
+
+
+class TestAssessorCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = QualityResultCache(os.path.join(self.tmp.name, 'quality.sqlite3'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repeat_assessment_is_cached(self):
+        """Second assessment of the same bytes is served from the cache"""
+        assessor = DocumentQualityAssessor(cache=self.cache)
+        first = assessor.assess_document_quality(TEST_DOCUMENT)
+        second = assessor.assess_document_quality(TEST_DOCUMENT)
+        self.assertNotIn('cached', first)
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['score'], first['score'])
+        self.assertEqual(second['level'], first['level'])
+        self.assertEqual(second['timestamp'], first['timestamp'])
+
+    def test_configurations_do_not_share_entries(self):
+        """Assessor settings are part of the cache key"""
+        DocumentQualityAssessor(cache=self.cache).assess_document_quality(TEST_DOCUMENT)
+        other = DocumentQualityAssessor(cache=self.cache, fft_method='tiles')
+        self.assertNotIn('cached', other.assess_document_quality(TEST_DOCUMENT))
+
+    def test_failures_are_not_cached(self):
+        assessor = DocumentQualityAssessor(cache=self.cache)
+        self.assertFalse(assessor.assess_image_bytes(b'not an image')['success'])
+        self.assertNotIn('cached', assessor.assess_image_bytes(b'not an image'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for vectorized quality recalibration"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from src.modules.document_processor import DocumentQualityAssessor
+from src.modules.quality_calibration import QualityCalibrator, weight_simplex
+
+
+def make_metrics(assessor: DocumentQualityAssessor, dpi: int, contrast: float, rotation: float,
+                 blur: float, brightness: float) -> dict:
+    """Metric results built through the assessor's own classifiers"""
+    return {
+        'dpi': assessor.assess_dpi(np.zeros((1, int(dpi * 215 / 25.4) + 1))),
+        'contrast': assessor._contrast_result(contrast * 128 / 100),
+        'rotation': assessor._rotation_result(rotation, 10),
+        'blur': assessor._blur_result({'laplacian': blur * 5, 'gradient': blur / 2, 'fft': blur * 1000}),
+        'brightness': assessor._brightness_result(brightness)
+    }
+
+
+class TestQualityCalibrator(unittest.TestCase):
+
+    def setUp(self):
+        self.assessor = DocumentQualityAssessor()
+        rng = np.random.default_rng(7)
+        # Values at the precision results are stored with, so stored and raw agree
+        self.corpus = []
+        for _ in range(300):
+            metrics = make_metrics(
+                self.assessor,
+                dpi=rng.integers(50, 300),
+                contrast=round(rng.uniform(40, 100), 1),
+                rotation=rng.choice([round(rng.uniform(0, 8), 2), 1.0, 5.0]),
+                blur=rng.choice([round(rng.uniform(20, 100), 1), 70.0, 40.0]),
+                brightness=rng.choice([round(rng.uniform(10, 250), 1), 50.0, 225.0])
+            )
+            self.corpus.append((metrics, rng.random() < 0.6))
+        self.calibrator = QualityCalibrator(self.assessor)
+        self.calibrator.load(self.corpus)
+
+    def test_scores_match_get_quality_score(self):
+        """Vectorized scores equal the per-document Python scoring, boundaries included"""
+        expected = [self.assessor.get_quality_score(metrics) for metrics, _ in self.corpus]
+        np.testing.assert_array_equal(self.calibrator.scores(), expected)
+
+    def test_skipped_and_missing_metrics(self):
+        metrics = make_metrics(self.assessor, 80, 50, 8, 20, 10)
+        metrics['blur'] = {'severity': None, 'skipped': True}
+        del metrics['rotation']
+        self.calibrator.load([({'metrics': metrics}, False)])
+        self.assertEqual(self.calibrator.scores()[0], self.assessor.get_quality_score(metrics))
+
+    def test_weight_sweep_matches_single_evaluations(self):
+        candidates = weight_simplex(5, step=0.25)
+        np.testing.assert_allclose(candidates.sum(axis=1), 1.0)
+        self.calibrator.SWEEP_CELLS = 1000  # force chunking
+        sweep = self.calibrator.sweep_weights(candidates)
+        for index in (0, len(candidates) // 2, len(candidates) - 1):
+            weights = dict(zip(self.calibrator.metric_names, candidates[index]))
+            self.assertAlmostEqual(
+                sweep['accuracy'][index], self.calibrator.evaluate(weights=weights)['accuracy']
+            )
+        self.assertEqual(sweep['best_accuracy'], sweep['accuracy'].max())
+
+    def test_threshold_sweep_matches_single_evaluations(self):
+        """Grid cells equal evaluating the same thresholds one at a time"""
+        for metric_name, green, yellow in (
+            ('contrast', [70, 75, 80], [55, 60, 90]),
+            ('brightness', [(50, 200), (60, 190)], [(30, 225), (55, 230)])
+        ):
+            sweep = self.calibrator.sweep_thresholds(metric_name, green, yellow)
+            for g, y in np.ndindex(*sweep['accuracy'].shape):
+                if np.isnan(sweep['accuracy'][g, y]):
+                    continue
+                thresholds = {metric_name: {'green': green[g], 'yellow': yellow[y]}}
+                self.assertAlmostEqual(
+                    sweep['accuracy'][g, y], self.calibrator.evaluate(thresholds)['accuracy']
+                )
+            self.assertIsNotNone(sweep['best'])
+        # Yellow above green is not a valid lower-bound configuration
+        sweep = self.calibrator.sweep_thresholds('contrast', [70], [90])
+        self.assertIsNone(sweep['best'])
+
+    def test_load_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'archive.jsonl')
+            with open(path, 'w') as f:
+                for metrics, label in self.corpus[:10]:
+                    f.write(json.dumps({'metrics': metrics, 'usable': label}) + '\n')
+            calibrator = QualityCalibrator(self.assessor)
+            self.assertEqual(calibrator.load_jsonl(path, label_key='usable'), 10)
+        np.testing.assert_array_equal(calibrator.scores(), self.calibrator.scores()[:10])
+
+
+if __name__ == '__main__':
+    unittest.main()